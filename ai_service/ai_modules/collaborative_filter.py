@@ -0,0 +1,145 @@
+import json
+import uuid
+from array import array
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, List, Any, Iterable, Iterator, Tuple
+import logging
+from .columnar import StringColumn, HashIndex, string_columns, read_string_column, publish, open_version
+
+logger = logging.getLogger(__name__)
+
+
+class ItemSimilarityModel:
+    """Sparse item-item (destination x destination) similarity learned from history.
+
+    Built offline from exported Itinerary/Booking documents: every user's set
+    of destinations becomes a row of a sparse users x items matrix ``U`` and
+    ``U.T @ U`` gives co-occurrence counts, turned into cosine similarities
+    and pruned to each item's strongest neighbours. The result is stored as
+    CSR arrays in a columnar store, so lookups are plain array slicing.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], version: str = None):
+        self.columns = columns
+        self.version = version
+        self.token = version or uuid.uuid4().hex
+        self.items, self.index = read_string_column("items", columns)
+        self.indptr = columns["similarity_indptr"]
+        self.indices = columns["similarity_indices"]
+        self.data = columns["similarity_data"]
+
+    @classmethod
+    def build(cls, pairs: Iterable[Tuple[str, str]], max_neighbours: int = 50,
+              min_cooccurrence: int = 2) -> "ItemSimilarityModel":
+        """Build the model from (user, destination) pairs without dense intermediates"""
+        user_codes, item_codes = {}, {}
+        users, items = array("q"), array("q")
+        for user, item in pairs:
+            users.append(user_codes.setdefault(user, len(user_codes)))
+            items.append(item_codes.setdefault(item, len(item_codes)))
+        n_items = len(item_codes)
+        logger.info(f"Building item similarity from {len(users)} pairs, {len(user_codes)} users, {n_items} items")
+
+        # Binary users x items interactions; repeated visits count once
+        interactions = sp.csr_matrix(
+            (np.ones(len(users), dtype=np.float32),
+             (np.frombuffer(users, dtype=np.int64), np.frombuffer(items, dtype=np.int64))),
+            shape=(len(user_codes), n_items)
+        )
+        interactions.sum_duplicates()
+        interactions.data[:] = 1
+
+        cooccurrence = (interactions.T @ interactions).tocoo()
+        item_counts = np.asarray(interactions.sum(axis=0)).ravel()
+        keep = (cooccurrence.row != cooccurrence.col) & (cooccurrence.data >= min_cooccurrence)
+        rows, cols = cooccurrence.row[keep], cooccurrence.col[keep]
+        similarity = cooccurrence.data[keep] / np.sqrt(item_counts[rows] * item_counts[cols])
+
+        # Keep the strongest max_neighbours per item; ties by item code
+        order = np.lexsort((cols, -similarity, rows))
+        rows, cols, similarity = rows[order], cols[order], similarity[order]
+        row_starts = np.searchsorted(rows, np.arange(n_items))
+        rank = np.arange(len(rows)) - row_starts[rows]
+        keep = rank < max_neighbours
+        rows, cols, similarity = rows[keep], cols[keep], similarity[keep]
+
+        indptr = np.zeros(n_items + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_items), out=indptr[1:])
+        names = StringColumn.from_strings(item_codes)
+        columns = string_columns("items", names, HashIndex.build(names))
+        columns.update({
+            "similarity_indptr": indptr,
+            "similarity_indices": cols.astype(np.int32),
+            "similarity_data": similarity.astype(np.float32)
+        })
+        return cls(columns)
+
+    @classmethod
+    def open(cls, root: str, version: str = None) -> "ItemSimilarityModel":
+        """Memory-map a published model (the current version by default)"""
+        columns, manifest = open_version(root, version)
+        logger.info(f"Opened item similarity model {manifest['version']} with {manifest['items']} items")
+        return cls(columns, manifest["version"])
+
+    def save(self, root: str) -> str:
+        """Publish this model as a new current version under ``root``"""
+        return publish(root, self.columns, {"items": len(self.items), "neighbours": len(self.data)})
+
+    def item_hashes(self) -> np.ndarray:
+        """Stable name hash of every item, in item order"""
+        return self.index.row_hashes()
+
+    def neighbour_scores(self, item_ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Mean similarity of every neighbour of the given items.
+
+        Returns ``(items, scores)``; cost is proportional to the number of
+        stored neighbours of ``item_ids``, not to the number of items.
+        """
+        if not item_ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        neighbours = np.concatenate([self.indices[self.indptr[i]:self.indptr[i + 1]] for i in item_ids])
+        similarity = np.concatenate([self.data[self.indptr[i]:self.indptr[i + 1]] for i in item_ids])
+        items, inverse = np.unique(neighbours, return_inverse=True)
+        scores = np.bincount(inverse, weights=similarity, minlength=len(items)) / len(item_ids)
+        return items, scores
+
+
+def read_history_pairs(paths: List[str]) -> Iterator[Tuple[str, str]]:
+    """Yield (user, destination) pairs from mongoexport JSONL files.
+
+    Itinerary documents contribute ``(user, destination)`` directly. Booking
+    documents are resolved to their itinerary's destination (falling back
+    to ``details.to``); cancelled bookings are skipped. Files are streamed
+    twice so itineraries are known before bookings are resolved.
+    """
+    itinerary_destinations = {}
+    for document in _read_documents(paths):
+        if "destination" in document and "user" in document:
+            destination = document["destination"]
+            itinerary_destinations[_object_id(document.get("_id"))] = destination
+            yield _object_id(document["user"]), destination
+
+    for document in _read_documents(paths):
+        if "bookingType" not in document or document.get("status") == "cancelled":
+            continue
+        destination = itinerary_destinations.get(_object_id(document.get("itinerary")))
+        destination = destination or (document.get("details") or {}).get("to")
+        if destination and "user" in document:
+            yield _object_id(document["user"]), destination
+
+
+def _read_documents(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def _object_id(value: Any) -> str:
+    """Normalize mongoexport ``{"$oid": ...}`` ids to plain strings"""
+    if isinstance(value, dict):
+        return value["$oid"] if "$oid" in value else json.dumps(value, sort_keys=True)
+    return str(value)
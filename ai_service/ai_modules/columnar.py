@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+from typing import Dict, Any, Iterable, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# On-disk layout of a columnar store:
+#   <root>/CURRENT              name of the active version directory
+#   <root>/<version>/manifest.json
+#   <root>/<version>/<column>.npy
+# Readers memory-map the .npy files, so every worker process shares the same
+# page cache instead of holding its own copy. Publishing writes a complete new
+# version directory first, atomically swaps CURRENT and then removes all but
+# the KEEP_VERSIONS most recent older versions, which workers that have not
+# reloaded yet may still be opening.
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+KEEP_VERSIONS = 2
+
+
+class StringColumn:
+    """Read-only sequence of strings stored as a UTF-8 blob plus row offsets"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "StringColumn":
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(blob, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class HashIndex:
+    """Key -> row lookup over a StringColumn through sorted 64-bit key hashes.
+
+    The hashes are stable across processes (unlike ``hash()``), so the index
+    can be persisted next to the column and memory-mapped by every worker.
+    """
+
+    def __init__(self, keys: StringColumn, hashes: np.ndarray, rows: np.ndarray):
+        self.keys = keys
+        self.hashes = hashes
+        self.rows = rows
+
+    @classmethod
+    def build(cls, keys: StringColumn) -> "HashIndex":
+        hashes = hash_strings(keys)
+        order = np.argsort(hashes, kind="stable")
+        return cls(keys, hashes[order], order.astype(np.int64))
+
+    def get(self, key: str, default=None):
+        target = hash_strings([key])[0]
+        start = np.searchsorted(self.hashes, target, side="left")
+        end = np.searchsorted(self.hashes, target, side="right")
+        for row in self.rows[start:end]:
+            if self.keys[row] == key:
+                return int(row)
+        return default
+
+    def row_hashes(self) -> np.ndarray:
+        """Key hash of every row, in row order"""
+        hashes = np.empty(len(self.rows), dtype=np.uint64)
+        hashes[self.rows] = self.hashes
+        return hashes
+
+    def lookup_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        """Vectorized row lookup by precomputed key hash; -1 where absent.
+
+        Matches on the 64-bit hash alone, without comparing the keys.
+        """
+        if len(self.hashes) == 0:
+            return np.full(len(hashes), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+        return np.where(self.hashes[positions] == hashes, self.rows[positions], -1)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __getitem__(self, key: str) -> int:
+        row = self.get(key)
+        if row is None:
+            raise KeyError(key)
+        return row
+
+
+def hash_strings(strings: Iterable[str]) -> np.ndarray:
+    """Stable 64-bit hashes of strings"""
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(string.encode("utf-8"), digest_size=8).digest(), "little")
+         for string in strings],
+        dtype=np.uint64
+    )
+
+
+def string_columns(prefix: str, column: StringColumn, index: HashIndex = None) -> Dict[str, np.ndarray]:
+    """Flatten a StringColumn (and optionally its HashIndex) into named arrays"""
+    arrays = {f"{prefix}_blob": column.blob, f"{prefix}_offsets": column.offsets}
+    if index is not None:
+        arrays[f"{prefix}_hashes"] = index.hashes
+        arrays[f"{prefix}_hash_rows"] = index.rows
+    return arrays
+
+
+def read_string_column(prefix: str, columns: Dict[str, np.ndarray]) -> Tuple[StringColumn, HashIndex]:
+    """Rebuild a StringColumn and its HashIndex (if stored) from named arrays"""
+    column = StringColumn(columns[f"{prefix}_blob"], columns[f"{prefix}_offsets"])
+    index = None
+    if f"{prefix}_hashes" in columns:
+        index = HashIndex(column, columns[f"{prefix}_hashes"], columns[f"{prefix}_hash_rows"])
+    return column, index
+
+
+def publish(root: str, columns: Dict[str, np.ndarray], manifest: Dict[str, Any],
+            keep: int = KEEP_VERSIONS) -> str:
+    """Write a new version of a columnar store, make it current atomically and prune old versions"""
+    version = uuid.uuid4().hex
+    version_dir = os.path.join(root, version)
+    os.makedirs(version_dir)
+
+    for name, array in columns.items():
+        np.save(os.path.join(version_dir, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+
+    manifest = dict(manifest, format_version=FORMAT_VERSION, columns=sorted(columns))
+    with open(os.path.join(version_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    pointer_tmp = os.path.join(root, f".{CURRENT_FILE}.{version}")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(root, CURRENT_FILE))
+    logger.info(f"Published columnar store version {version} to {root}")
+    prune_versions(root, keep)
+    return version
+
+
+def prune_versions(root: str, keep: int = KEEP_VERSIONS) -> List[str]:
+    """Remove all but the current version and the ``keep`` newest others; returns the removed versions.
+
+    Only directories holding a manifest count as versions. A worker that
+    already memory-mapped a removed version keeps reading it until it
+    reloads, since unlinked files stay readable while mapped.
+    """
+    current = current_version(root)
+    manifests = {
+        name: os.path.join(root, name, MANIFEST_FILE)
+        for name in os.listdir(root)
+        if name != current and os.path.isfile(os.path.join(root, name, MANIFEST_FILE))
+    }
+    older = sorted(manifests, key=lambda name: os.stat(manifests[name]).st_mtime_ns, reverse=True)
+    removed = older[max(keep, 0):]
+    for name in removed:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    if removed:
+        logger.info(f"Removed {len(removed)} old columnar store versions from {root}")
+    return removed
+
+
+def current_version(root: str) -> str:
+    """Return the active version of a columnar store, or None if nothing is published"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def open_version(root: str, version: str = None) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Memory-map every column of a store version (the current one by default)"""
+    version = version or current_version(root)
+    if version is None:
+        raise FileNotFoundError(f"No columnar store published in {root}")
+
+    version_dir = os.path.join(root, version)
+    with open(os.path.join(version_dir, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar store format {manifest.get('format_version')} in {version_dir}")
+
+    columns = {name: _load_column(os.path.join(version_dir, f"{name}.npy")) for name in manifest["columns"]}
+    manifest["version"] = version
+    return columns, manifest
+
+
+def _load_column(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r", allow_pickle=False)
+    except ValueError:
+        # Empty arrays cannot be memory-mapped
+        return np.load(path, allow_pickle=False)
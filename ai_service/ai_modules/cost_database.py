@@ -0,0 +1,102 @@
+import os
+import uuid
+import numpy as np
+from typing import Dict, Any
+import logging
+from .columnar import StringColumn, HashIndex, string_columns, read_string_column, publish, open_version
+
+logger = logging.getLogger(__name__)
+
+# Axes of the per-destination cost tables
+COST_TIERS = ["budget", "mid", "luxury"]
+COST_CATEGORIES = ["accommodation", "food", "transportation", "activities"]
+HEMISPHERES = ["northern", "southern"]
+
+# Snapshot layout: one row per destination with a "<category>_<tier>" daily
+# cost column for every category and tier, plus optional cost_index and
+# hemisphere columns
+NAME_COLUMN = "destination"
+COST_COLUMNS = [f"{category}_{tier}" for category in COST_CATEGORIES for tier in COST_TIERS]
+
+
+class CostDatabase:
+    """Columnar table of per-destination daily cost tiers.
+
+    Costs are one destinations x tiers x categories float64 array, next to
+    cost index and hemisphere columns and a hashed name -> row index, all
+    published to a columnar store and memory-mapped by ``open``. Workers
+    therefore start in constant time and share one copy of the table
+    through the page cache however many destinations it holds.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], version: str = None):
+        self.columns = columns
+        self.version = version
+        self.token = version or uuid.uuid4().hex
+        self.names, self.index = read_string_column("names", columns)
+        self.tier_costs = columns["tier_costs"]
+        self.cost_index = columns["cost_index"]
+        self.hemisphere = columns["hemisphere"]
+
+    @classmethod
+    def from_frame(cls, frame) -> "CostDatabase":
+        """Encode a pandas DataFrame in the snapshot layout; later duplicate names win"""
+        missing = [column for column in [NAME_COLUMN] + COST_COLUMNS if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Cost snapshot is missing columns: {', '.join(missing)}")
+        frame = frame.drop_duplicates(NAME_COLUMN, keep="last")
+
+        names = StringColumn.from_strings(frame[NAME_COLUMN].astype(str))
+        columns = string_columns("names", names, HashIndex.build(names))
+        costs = frame[COST_COLUMNS].to_numpy(dtype=np.float64)
+        columns["tier_costs"] = costs.reshape(len(frame), len(COST_CATEGORIES), len(COST_TIERS)).transpose(0, 2, 1)
+
+        if "cost_index" in frame.columns:
+            columns["cost_index"] = frame["cost_index"].fillna(1.0).to_numpy(dtype=np.float64)
+        else:
+            columns["cost_index"] = np.ones(len(frame))
+        hemispheres = frame["hemisphere"].fillna("northern") if "hemisphere" in frame.columns else None
+        columns["hemisphere"] = (
+            (hemispheres.str.lower() == "southern").to_numpy(dtype=np.int8)
+            if hemispheres is not None else np.zeros(len(frame), dtype=np.int8)
+        )
+        return cls(columns)
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> "CostDatabase":
+        """Read a CSV or Parquet snapshot (Parquet needs pyarrow)"""
+        import pandas as pd
+
+        if os.path.splitext(path)[1].lower() in (".parquet", ".pq"):
+            frame = pd.read_parquet(path)
+        else:
+            frame = pd.read_csv(path)
+        return cls.from_frame(frame)
+
+    @classmethod
+    def open(cls, root: str, version: str = None) -> "CostDatabase":
+        """Memory-map a published cost database (the current version by default)"""
+        columns, manifest = open_version(root, version)
+        logger.info(f"Opened cost database {manifest['version']} with {manifest['size']} destinations")
+        return cls(columns, manifest["version"])
+
+    def save(self, root: str) -> str:
+        """Publish this table as a new current version under ``root``"""
+        return publish(root, self.columns, {"size": len(self)})
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def costs(self, row: int) -> Dict[str, Any]:
+        """Decode row ``row`` into the CostPredictor cost data format"""
+        tier_costs = self.tier_costs[row]
+        costs = {
+            category: {tier: float(tier_costs[t, c]) for t, tier in enumerate(COST_TIERS)}
+            for c, category in enumerate(COST_CATEGORIES)
+        }
+        costs["cost_index"] = float(self.cost_index[row])
+        costs["hemisphere"] = HEMISPHERES[self.hemisphere[row]]
+        return costs
@@ -1,15 +1,70 @@
 import json
 import random
+import numpy as np
 from typing import Dict, List, Any
 import logging
 from datetime import datetime
+from .cost_database import CostDatabase, COST_TIERS, COST_CATEGORIES
+from .currency import CurrencyConverter, BASE_CURRENCY
+from .result_cache import ResultCache
 
 logger = logging.getLogger(__name__)
 
+MISCELLANEOUS_RATE = 0.1
+
+# Budget allocation categories: the cost categories plus miscellaneous, last
+ALLOCATION_CATEGORIES = COST_CATEGORIES + ["miscellaneous"]
+
+# Monte Carlo trips simulated per uncertainty estimate, with a fixed seed so
+# the same request always reports the same bands
+UNCERTAINTY_SAMPLES = 4000
+UNCERTAINTY_SEED = 20240601
+
+# Meteorological season of each calendar month (January first) by hemisphere
+SEASONS = ["spring", "summer", "autumn", "winter"]
+MONTH_SEASONS = {
+    "northern": np.array([3, 3, 0, 0, 0, 1, 1, 1, 2, 2, 2, 3]),
+    "southern": np.array([1, 1, 2, 2, 2, 3, 3, 3, 0, 0, 0, 1])
+}
+
 class CostPredictor:
-    def __init__(self):
+    def __init__(self, memo_size: int = 4096, cost_database_path: str = None,
+                 rates_path: str = None):
         self.cost_data = self._load_cost_data()
+        # Optional memory-mapped cost table; takes precedence over cost_data
+        self.cost_database = CostDatabase.open(cost_database_path) if cost_database_path else None
+        # Costs are stored in BASE_CURRENCY and converted on the way out
+        self.currency_converter = CurrencyConverter(rates_path)
         self.seasonal_factors = self._load_seasonal_factors()
+        self.cost_variation = self._load_cost_variation()
+        self.season_factor_array = np.array([self.seasonal_factors[season] for season in SEASONS])
+        self.style_tiers = self._load_style_tiers()
+        self.allocation_weights = self._load_allocation_weights()
+        self.preference_boosts = self._load_preference_boosts()
+        self.style_recommendations = self._load_style_recommendations()
+        self.generic_costs = self._get_generic_costs(None)
+        self.tier_costs = {
+            destination: self._build_tier_costs(dest_costs)
+            for destination, dest_costs in self.cost_data.items()
+        }
+        self.generic_tier_costs = self._build_tier_costs(self.generic_costs)
+        
+        # Per-person daily category costs of every (destination, tier), plus
+        # the generic rows keyed by tier alone
+        self.daily_cost_rows = {
+            (destination, tier): self._build_daily_cost_row(dest_costs, tier)
+            for destination, dest_costs in self.cost_data.items()
+            for tier in COST_TIERS
+        }
+        self.generic_daily_cost_rows = {
+            tier: self._build_daily_cost_row(self.generic_costs, tier) for tier in COST_TIERS
+        }
+        
+        self.uncertainty_draws = self._draw_cost_multipliers()
+        
+        # Whole predictions are pure functions of their arguments; cost data is
+        # static, so memoized entries never expire and are only evicted by size
+        self.prediction_cache = ResultCache(memo_size, ttl=None, copy_value=self._copy_prediction)
         
     def _load_cost_data(self) -> Dict[str, Any]:
         """Load destination-specific cost data"""
@@ -19,21 +74,24 @@ class CostPredictor:
                 "food": {"budget": 30, "mid": 60, "luxury": 120},
                 "transportation": {"budget": 15, "mid": 25, "luxury": 50},
                 "activities": {"budget": 20, "mid": 40, "luxury": 80},
-                "cost_index": 1.2
+                "cost_index": 1.2,
+                "hemisphere": "northern"
             },
             "Tokyo": {
                 "accommodation": {"budget": 70, "mid": 140, "luxury": 350},
                 "food": {"budget": 25, "mid": 50, "luxury": 100},
                 "transportation": {"budget": 12, "mid": 20, "luxury": 40},
                 "activities": {"budget": 18, "mid": 35, "luxury": 70},
-                "cost_index": 1.1
+                "cost_index": 1.1,
+                "hemisphere": "northern"
             },
             "New York": {
                 "accommodation": {"budget": 100, "mid": 200, "luxury": 500},
                 "food": {"budget": 35, "mid": 70, "luxury": 140},
                 "transportation": {"budget": 20, "mid": 30, "luxury": 60},
                 "activities": {"budget": 25, "mid": 50, "luxury": 100},
-                "cost_index": 1.4
+                "cost_index": 1.4,
+                "hemisphere": "northern"
             }
         }
     
@@ -46,65 +104,398 @@ class CostPredictor:
             "winter": 0.8
         }
     
-    def predict(self, destination: str, duration: int, travel_style: str = "balanced",
-               group_size: int = 1, season: str = None) -> Dict[str, Any]:
-        """Predict travel costs for a destination"""
+    def _load_cost_variation(self) -> Dict[str, float]:
+        """Load the coefficient of variation of each cost category"""
+        return {
+            "accommodation": 0.15,
+            "food": 0.25,
+            "transportation": 0.3,
+            "activities": 0.35,
+            "miscellaneous": 0.5
+        }
+    
+    def _load_allocation_weights(self) -> Dict[str, float]:
+        """Load the default share of discretionary budget per category"""
+        return {
+            "accommodation": 0.4,
+            "food": 0.25,
+            "transportation": 0.15,
+            "activities": 0.15,
+            "miscellaneous": 0.05
+        }
+    
+    def _load_preference_boosts(self) -> Dict[str, Dict[str, float]]:
+        """Load the allocation weight multipliers applied by preference flags"""
+        return {
+            "food_focused": {"food": 1.5},
+            "activity_focused": {"activities": 1.5},
+            "luxury_accommodation": {"accommodation": 1.5}
+        }
+    
+    def _load_style_tiers(self) -> Dict[str, str]:
+        """Load the travel style to cost tier mapping"""
+        return {
+            "budget": "budget",
+            "balanced": "mid",
+            "luxury": "luxury",
+            "adventure": "budget",
+            "cultural": "mid",
+            "relaxation": "luxury"
+        }
+    
+    def _load_style_recommendations(self) -> Dict[str, List[str]]:
+        """Load the travel style specific cost recommendations"""
+        return {
+            "budget": [
+                "Consider staying in hostels or budget accommodations",
+                "Use public transportation instead of taxis",
+                "Eat at local markets and street food vendors",
+                "Look for free activities and attractions",
+                "Book flights and accommodations in advance"
+            ],
+            "luxury": [
+                "Book premium experiences and services",
+                "Consider all-inclusive packages",
+                "Opt for private transportation",
+                "Reserve at high-end restaurants",
+                "Include spa and wellness experiences"
+            ]
+        }
+    
+    def _build_daily_cost_row(self, dest_costs: Dict[str, Any], tier: str) -> tuple:
+        """Per-person daily costs of one tier, in COST_CATEGORIES order"""
+        return tuple(dest_costs[category][tier] for category in COST_CATEGORIES)
+    
+    def _build_tier_costs(self, dest_costs: Dict[str, Any]) -> np.ndarray:
+        """Per-person daily costs as a tiers x categories array"""
+        return np.array([
+            [dest_costs[category][tier] for category in COST_CATEGORIES]
+            for tier in COST_TIERS
+        ], dtype=np.float64)
+    
+    def daily_tier_totals(self, index, size: int) -> np.ndarray:
+        """Per-person daily total of each cost tier, aligned to the rows of ``index``.
         
-        # Get base cost data
-        dest_costs = self.cost_data.get(destination, self._get_generic_costs(destination))
+        ``index`` is a HashIndex over destination names with rows
+        0..size-1. Destinations without cost data get the generic costs, as
+        in ``predict``; the cost database is joined on name hashes in one
+        vectorized lookup.
+        """
+        totals = np.tile(self.generic_tier_costs.sum(axis=1), (size, 1))
+        for destination, tier_costs in self.tier_costs.items():
+            row = index.get(destination)
+            if row is not None:
+                totals[row] = tier_costs.sum(axis=1)
+        if self.cost_database is not None:
+            rows = self.cost_database.index.lookup_hashes(index.row_hashes())
+            found = rows >= 0
+            totals[found] = self.cost_database.tier_costs[rows[found]].sum(axis=2)
+        return totals
+    
+    def cost_tier_index(self, travel_style: str) -> int:
+        """Column of ``daily_tier_totals`` that ``predict`` uses for a travel style"""
+        return COST_TIERS.index(self._get_cost_tier(travel_style))
+    
+    def _database_row(self, destination: str):
+        """Row of a destination in the cost database, or None"""
+        if self.cost_database is None or not isinstance(destination, str):
+            return None
+        return self.cost_database.index.get(destination)
+    
+    def _destination_costs(self, destination: str) -> Dict[str, Any]:
+        """Cost data of a destination: the cost database, built-in data, then generic costs"""
+        row = self._database_row(destination)
+        if row is not None:
+            return self.cost_database.costs(row)
+        return self.cost_data.get(destination, self.generic_costs)
+    
+    def _destination_tier_costs(self, destination: str) -> np.ndarray:
+        """Tiers x categories per-person daily costs, resolved like ``_destination_costs``"""
+        row = self._database_row(destination)
+        if row is not None:
+            return self.cost_database.tier_costs[row]
+        return self.tier_costs.get(destination, self.generic_tier_costs)
+    
+    def predict_grid(self, destinations: List[str], durations: List[int],
+                     travel_styles: List[str] = None, group_sizes: List[int] = None,
+                     seasons: List[str] = None, currency: str = None) -> Dict[str, Any]:
+        """Predict total costs for every combination of the given axes at once.
+        
+        Equivalent to calling ``predict`` for each (destination, duration,
+        travel style, group size, season) cell, computed with array
+        broadcasting over the precomputed tier costs. Costs are returned as
+        flat row-major lists: ``totalCost`` over all five axes and the daily
+        figures over every axis except duration, which they do not depend on.
+        A single value instead of a list is an axis of length one.
+        """
+        rate = self._conversion_rate(self.currency_converter.rates, currency)
+        destinations = self._grid_axis(destinations)
+        durations = self._grid_axis(durations)
+        travel_styles = self._grid_axis(travel_styles) or ["balanced"]
+        group_sizes = self._grid_axis(group_sizes) or [1]
+        seasons = self._grid_axis(seasons) or [None]
+        if not destinations or not durations:
+            raise ValueError("destinations and durations must not be empty")
+        
+        # destinations x tiers x categories, then one tier per travel style
+        tier_costs = np.stack([self._destination_tier_costs(destination) for destination in destinations])
+        tiers = [self.cost_tier_index(style) for style in travel_styles]
+        seasonal_factors = np.array([self.seasonal_factors.get(season, 1.0) if season else 1.0
+                                     for season in seasons])
+        
+        # destinations x styles x group sizes (x seasons) x categories
+        group_costs = tier_costs[:, tiers, None, :] * np.asarray(group_sizes, dtype=np.float64)[:, None]
+        daily_costs = group_costs[:, :, :, None, :] * seasonal_factors[:, None]
+        total_daily = group_costs.sum(axis=-1)[..., None] * seasonal_factors
+        
+        # destinations x durations x styles x group sizes x seasons
+        total_trip = total_daily[:, None] * np.asarray(durations, dtype=np.float64)[None, :, None, None, None]
+        misc_costs = total_trip * MISCELLANEOUS_RATE
+        
+        # Convert every cost array with one multiply each before rounding; the
+        # total is summed before converting, as in ``_predict``
+        total_costs = (total_trip + misc_costs) * rate
+        daily_costs, total_daily, misc_costs = (
+            costs * rate for costs in (daily_costs, total_daily, misc_costs)
+        )
+        
+        return {
+            "axes": {
+                "destinations": list(destinations),
+                "durations": list(durations),
+                "travelStyles": list(travel_styles),
+                "groupSizes": list(group_sizes),
+                "seasons": list(seasons)
+            },
+            "shape": list(total_trip.shape),
+            "totalCost": self._round_costs(total_costs),
+            "miscellaneous": self._round_costs(misc_costs),
+            "dailyShape": list(total_daily.shape),
+            "dailyBreakdown": dict(
+                {category: self._round_costs(daily_costs[..., c])
+                 for c, category in enumerate(COST_CATEGORIES)},
+                total=self._round_costs(total_daily)
+            ),
+            "currency": (currency or BASE_CURRENCY).upper(),
+            "seasonalFactors": seasonal_factors.tolist(),
+            "costIndex": [self._destination_costs(destination).get("cost_index", 1.0)
+                          for destination in destinations]
+        }
+    
+    def _round_costs(self, costs: np.ndarray) -> List[float]:
+        """Flat row-major list rounded to cents with ``round``, as ``_predict`` rounds.
+        
+        ``np.round`` scales by 100 first, which can round the other way on
+        converted amounts that sit at half a cent.
+        """
+        return [round(cost, 2) for cost in costs.ravel().tolist()]
+    
+    def _grid_axis(self, values) -> list:
+        """Values of one grid axis as a list, so a lone string is not split into characters"""
+        if values is None:
+            return []
+        if isinstance(values, (str, int, float)):
+            return [values]
+        return list(values)
+    
+    def predict(self, destination: str, duration: int = None, travel_style: str = "balanced",
+               group_size: int = 1, season: str = None, start_date: str = None,
+               end_date: str = None, hemisphere: str = None,
+               uncertainty: bool = False, currency: str = None) -> Dict[str, Any]:
+        """Predict travel costs for a destination.
+        
+        Given a ``start_date`` (and an ``end_date``, or a ``duration`` in days)
+        the seasonal factor is derived per day of the trip from the
+        destination's hemisphere instead of a single ``season``. With
+        ``uncertainty`` the result also carries P10/P50/P90 trip costs.
+        Costs are in ``currency``, or BASE_CURRENCY when it is omitted.
+        """
+        # Pin one rates snapshot for the whole request; memoized results are
+        # keyed on it so a rates refresh never serves stale conversions
+        rates = self.currency_converter.rates
+        rate = self._conversion_rate(rates, currency)
+        args = (destination, duration, travel_style, group_size, season, start_date, end_date, hemisphere,
+                uncertainty, currency, rate)
+        key = args[:-1] + (rates.token if currency else None,)
+        try:
+            prediction = self.prediction_cache.get(key)
+        except TypeError:
+            # Unhashable arguments are computed without memoization
+            return self._predict(*args)
+        
+        if prediction is None:
+            prediction = self._predict(*args)
+            self.prediction_cache.set(key, prediction)
+        return prediction
+    
+    def _predict(self, destination: str, duration: int, travel_style: str,
+                 group_size: int, season: str, start_date: str = None,
+                 end_date: str = None, hemisphere: str = None,
+                 uncertainty: bool = False, currency: str = None,
+                 rate: float = 1.0) -> Dict[str, Any]:
+        """Compute a cost prediction from the precomputed daily cost rows"""
         
         # Determine cost tier based on travel style
         cost_tier = self._get_cost_tier(travel_style)
         
+        # Get base cost data
+        database_row = self._database_row(destination)
+        if database_row is not None:
+            dest_costs = self.cost_database.costs(database_row)
+            row = self._build_daily_cost_row(dest_costs, cost_tier)
+        else:
+            dest_costs = self.cost_data.get(destination, self.generic_costs)
+            row = self.daily_cost_rows.get((destination, cost_tier))
+            if row is None:
+                row = self.generic_daily_cost_rows[cost_tier]
+        
         # Calculate daily costs
-        daily_costs = {
-            "accommodation": dest_costs["accommodation"][cost_tier] * group_size,
-            "food": dest_costs["food"][cost_tier] * group_size,
-            "transportation": dest_costs["transportation"][cost_tier] * group_size,
-            "activities": dest_costs["activities"][cost_tier] * group_size
-        }
+        accommodation, food, transportation, activities = (cost * group_size for cost in row)
         
-        # Apply seasonal factor
-        seasonal_factor = self.seasonal_factors.get(season, 1.0) if season else 1.0
+        # Apply seasonal factor, averaged over the trip's days when dates are given
+        season_days = None
+        if start_date:
+            hemisphere = hemisphere or dest_costs.get("hemisphere", "northern")
+            duration, season_days = self._count_season_days(start_date, end_date, duration, hemisphere)
+            seasonal_factor = float(season_days @ self.season_factor_array) / duration
+        else:
+            seasonal_factor = self.seasonal_factors.get(season, 1.0) if season else 1.0
         
         # Calculate total costs
-        total_daily = sum(daily_costs.values()) * seasonal_factor
+        total_daily = (accommodation + food + transportation + activities) * seasonal_factor
         total_trip = total_daily * duration
         
         # Add miscellaneous costs
-        misc_costs = total_trip * 0.1  # 10% for miscellaneous expenses
+        misc_costs = total_trip * MISCELLANEOUS_RATE  # 10% for miscellaneous expenses
         
-        return {
+        # Convert the whole breakdown at once, then round each figure
+        daily_accommodation, daily_food, daily_transportation, daily_activities, daily_total, trip_cost, misc = (
+            round(cost, 2) for cost in (np.array([
+                accommodation * seasonal_factor,
+                food * seasonal_factor,
+                transportation * seasonal_factor,
+                activities * seasonal_factor,
+                total_daily,
+                total_trip + misc_costs,
+                misc_costs
+            ]) * rate).tolist()
+        )
+        
+        prediction = {
             "destination": destination,
             "duration": duration,
             "travelStyle": travel_style,
             "groupSize": group_size,
             "season": season,
             "dailyBreakdown": {
-                "accommodation": round(daily_costs["accommodation"] * seasonal_factor, 2),
-                "food": round(daily_costs["food"] * seasonal_factor, 2),
-                "transportation": round(daily_costs["transportation"] * seasonal_factor, 2),
-                "activities": round(daily_costs["activities"] * seasonal_factor, 2),
-                "total": round(total_daily, 2)
+                "accommodation": daily_accommodation,
+                "food": daily_food,
+                "transportation": daily_transportation,
+                "activities": daily_activities,
+                "total": daily_total
             },
-            "totalCost": round(total_trip + misc_costs, 2),
-            "miscellaneous": round(misc_costs, 2),
+            "totalCost": trip_cost,
+            "miscellaneous": misc,
+            "currency": (currency or BASE_CURRENCY).upper(),
             "seasonalFactor": seasonal_factor,
             "costIndex": dest_costs.get("cost_index", 1.0),
             "recommendations": self._generate_cost_recommendations(destination, travel_style, total_trip)
         }
+        if uncertainty:
+            daily_costs = np.array([accommodation, food, transportation, activities], dtype=np.float64)
+            prediction["costRange"] = self._simulate_cost_range(daily_costs * seasonal_factor, duration, rate)
+        if season_days is not None:
+            prediction.update({
+                "startDate": start_date,
+                "endDate": end_date,
+                "hemisphere": hemisphere,
+                "seasonalFactor": round(seasonal_factor, 4),
+                "seasonDays": {
+                    SEASONS[i]: int(days) for i, days in enumerate(season_days) if days
+                }
+            })
+        return prediction
+    
+    def _draw_cost_multipliers(self) -> np.ndarray:
+        """Seeded trips x (categories + miscellaneous) lognormal multipliers with mean 1.
+        
+        Each simulated trip gets one multiplier per cost category (in
+        COST_CATEGORIES order) and one for the miscellaneous rate, last, with
+        spreads from ``cost_variation``. The draws do not depend on the
+        request, so they are made once and reused by every simulation.
+        """
+        variation = np.array([self.cost_variation[category] for category in COST_CATEGORIES + ["miscellaneous"]])
+        sigma = np.sqrt(np.log1p(variation ** 2))
+        rng = np.random.default_rng(UNCERTAINTY_SEED)
+        return rng.lognormal(-sigma ** 2 / 2, sigma, size=(UNCERTAINTY_SAMPLES, len(variation)))
+    
+    def _simulate_cost_range(self, daily_costs: np.ndarray, duration: int,
+                             rate: float = 1.0) -> Dict[str, Any]:
+        """P10/P50/P90 total trip cost over the simulated trips.
+        
+        The multipliers have mean 1, so the point estimate stays the expected
+        cost while categories with more price variance widen the bands.
+        """
+        draws = self.uncertainty_draws
+        trips = (draws[:, :-1] @ daily_costs) * duration
+        totals = trips * (1 + draws[:, -1] * MISCELLANEOUS_RATE)
+        p10, p50, p90 = np.percentile(totals, [10, 50, 90]) * rate
+        return {
+            "p10": round(float(p10), 2),
+            "p50": round(float(p50), 2),
+            "p90": round(float(p90), 2),
+            "samples": UNCERTAINTY_SAMPLES
+        }
+    
+    def _count_season_days(self, start_date: str, end_date: str, duration: int,
+                           hemisphere: str):
+        """Return the trip length and its days per season (in SEASONS order).
+        
+        The range is inclusive of both dates, as for itineraries; without an
+        ``end_date`` it spans ``duration`` days from ``start_date``.
+        """
+        if hemisphere not in MONTH_SEASONS:
+            raise ValueError(f"Unknown hemisphere: {hemisphere}")
+        start = np.datetime64(str(start_date)[:10], "D")
+        if end_date:
+            end = np.datetime64(str(end_date)[:10], "D")
+        elif duration:
+            end = start + np.timedelta64(int(duration) - 1, "D")
+        else:
+            raise ValueError("end_date or duration is required with start_date")
+        if end < start:
+            raise ValueError("end_date must not be before start_date")
+        
+        # Count days per calendar month from the month boundaries, so the
+        # work grows with the months spanned rather than with trip length
+        stop = end + np.timedelta64(1, "D")
+        months = np.arange(start.astype("datetime64[M]"), end.astype("datetime64[M]") + np.timedelta64(2, "M"))
+        bounds = np.minimum(np.maximum(months.astype("datetime64[D]"), start), stop)
+        month_days = np.diff(bounds).astype(np.int64)
+        seasons = MONTH_SEASONS[hemisphere][months[:-1].astype(np.int64) % 12]
+        season_days = np.bincount(seasons, weights=month_days, minlength=len(SEASONS)).astype(np.int64)
+        return int((stop - start).astype(np.int64)), season_days
+    
+    def _conversion_rate(self, rates, currency: str) -> float:
+        """Multiplier from BASE_CURRENCY into ``currency`` (1.0 when omitted)"""
+        return rates.rate(BASE_CURRENCY, currency) if currency else 1.0
+    
+    def _copy_prediction(self, prediction: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a prediction's mutable parts; every leaf is an immutable scalar"""
+        copied = dict(
+            prediction,
+            dailyBreakdown=dict(prediction["dailyBreakdown"]),
+            recommendations=list(prediction["recommendations"])
+        )
+        if "costRange" in prediction:
+            copied["costRange"] = dict(prediction["costRange"])
+        if "seasonDays" in prediction:
+            copied["seasonDays"] = dict(prediction["seasonDays"])
+        return copied
     
     def _get_cost_tier(self, travel_style: str) -> str:
         """Map travel style to cost tier"""
-        style_mapping = {
-            "budget": "budget",
-            "balanced": "mid",
-            "luxury": "luxury",
-            "adventure": "budget",
-            "cultural": "mid",
-            "relaxation": "luxury"
-        }
-        return style_mapping.get(travel_style, "mid")
+        return self.style_tiers.get(travel_style, "mid")
     
     def _get_generic_costs(self, destination: str) -> Dict[str, Any]:
         """Generate generic cost data for unknown destinations"""
@@ -113,29 +504,13 @@ class CostPredictor:
             "food": {"budget": 25, "mid": 50, "luxury": 100},
             "transportation": {"budget": 15, "mid": 25, "luxury": 50},
             "activities": {"budget": 20, "mid": 40, "luxury": 80},
-            "cost_index": 1.0
+            "cost_index": 1.0,
+            "hemisphere": "northern"
         }
     
     def _generate_cost_recommendations(self, destination: str, travel_style: str, total_cost: float) -> List[str]:
         """Generate cost-saving recommendations"""
-        recommendations = []
-        
-        if travel_style == "budget":
-            recommendations.extend([
-                "Consider staying in hostels or budget accommodations",
-                "Use public transportation instead of taxis",
-                "Eat at local markets and street food vendors",
-                "Look for free activities and attractions",
-                "Book flights and accommodations in advance"
-            ])
-        elif travel_style == "luxury":
-            recommendations.extend([
-                "Book premium experiences and services",
-                "Consider all-inclusive packages",
-                "Opt for private transportation",
-                "Reserve at high-end restaurants",
-                "Include spa and wellness experiences"
-            ])
+        recommendations = list(self.style_recommendations.get(travel_style, ()))
         
         # Add general recommendations
         recommendations.extend([
@@ -147,60 +522,201 @@ class CostPredictor:
         return recommendations
     
     def optimize_budget(self, total_budget: float, destination: str, duration: int,
-                       preferences: Dict[str, Any]) -> Dict[str, Any]:
-        """Optimize budget allocation across different categories"""
-        
-        # Get base costs
-        dest_costs = self.cost_data.get(destination, self._get_generic_costs(destination))
-        
-        # Calculate optimal allocation based on preferences
-        allocation = {
-            "accommodation": 0.4,  # 40% default
-            "food": 0.25,          # 25% default
-            "transportation": 0.15, # 15% default
-            "activities": 0.15,    # 15% default
-            "miscellaneous": 0.05  # 5% default
-        }
-        
-        # Adjust based on preferences
-        if preferences.get("food_focused"):
-            allocation["food"] += 0.1
-            allocation["accommodation"] -= 0.05
-            allocation["activities"] -= 0.05
+                       preferences: Dict[str, Any], currency: str = None) -> Dict[str, Any]:
+        """Optimize budget allocation across different categories.
         
-        if preferences.get("activity_focused"):
-            allocation["activities"] += 0.1
-            allocation["accommodation"] -= 0.05
-            allocation["food"] -= 0.05
+        ``total_budget`` and the returned amounts are in ``currency``; the
+        allocation itself is solved in BASE_CURRENCY.
+        """
+        rate = self._conversion_rate(self.currency_converter.rates, currency)
+        budgets, durations = self._budget_arrays(total_budget, duration)
         
-        if preferences.get("luxury_accommodation"):
-            allocation["accommodation"] += 0.1
-            allocation["food"] -= 0.05
-            allocation["activities"] -= 0.05
+        # Get base costs
+        dest_costs = self._destination_costs(destination)
         
-        # Calculate daily budget
-        daily_budget = total_budget / duration
+        # Solve the allocation as a batch of one
+        daily_budget = float(budgets / durations)
+        allocation, feasible = self._solve_allocation(
+            np.array([daily_budget / rate], dtype=np.float64),
+            *self._allocation_bounds([destination]),
+            self._allocation_weight_array(preferences)[None, :]
+        )
         
         # Calculate category budgets
-        category_budgets = {}
-        for category, percentage in allocation.items():
-            category_budgets[category] = round(daily_budget * percentage, 2)
+        category_budgets = {
+            category: round(float(amount), 2)
+            for category, amount in zip(ALLOCATION_CATEGORIES, allocation[0])
+        }
         
         # Generate recommendations
         recommendations = self._generate_optimization_recommendations(
             destination, category_budgets, preferences
         )
+        minimum_daily = float(self._allocation_bounds([destination])[0].sum()) * rate
+        if not feasible[0]:
+            recommendations.insert(0, (
+                f"Your daily budget is below the minimum of {minimum_daily:.2f} for {destination}; "
+                "consider a shorter trip or a more affordable destination"
+            ))
         
         return {
             "totalBudget": total_budget,
             "dailyBudget": round(daily_budget, 2),
             "duration": duration,
             "destination": destination,
-            "categoryAllocation": category_budgets,
+            "currency": (currency or BASE_CURRENCY).upper(),
+            "categoryAllocation": dict(zip(
+                ALLOCATION_CATEGORIES, (round(amount, 2) for amount in (allocation[0] * rate).tolist())
+            )),
+            "feasible": bool(feasible[0]),
+            "minimumDailyCost": round(minimum_daily, 2),
             "recommendations": recommendations,
             "budgetEfficiency": self._calculate_budget_efficiency(category_budgets, dest_costs)
         }
     
+    def optimize_budgets(self, total_budgets: List[float], destinations, durations,
+                         preferences=None, currency: str = None) -> Dict[str, Any]:
+        """Optimize many budget allocations in one vectorized solve.
+        
+        ``destinations`` and ``durations`` are lists matching ``total_budgets``
+        or single values applied to every budget, and both are required;
+        ``preferences`` is one dict for all budgets or a list with one dict
+        each. Daily allocations are returned as one list per category, in
+        ``currency`` like the budgets.
+        """
+        rate = self._conversion_rate(self.currency_converter.rates, currency)
+        if destinations is None or durations is None:
+            raise ValueError("destinations and durations are required")
+        budgets, durations = self._budget_arrays(total_budgets, durations)
+        if budgets.ndim != 1 or len(budgets) == 0:
+            raise ValueError("total_budgets must be a non-empty list")
+        destinations = np.broadcast_to(np.asarray(destinations, dtype=object), budgets.shape)
+        
+        # Bounds and weights are built once per distinct destination / preference set
+        names, destination_rows = np.unique(destinations.astype(str), return_inverse=True)
+        floors, caps = (bounds[destination_rows] for bounds in self._allocation_bounds(list(names)))
+        if isinstance(preferences, list):
+            if len(preferences) != len(budgets):
+                raise ValueError("preferences must be one dict or one per budget")
+            weights = np.stack([self._allocation_weight_array(preference) for preference in preferences])
+        else:
+            weights = np.broadcast_to(self._allocation_weight_array(preferences), floors.shape)
+        
+        daily_budgets = budgets / durations
+        allocation, feasible = self._solve_allocation(daily_budgets / rate, floors, caps, weights)
+        allocation = allocation * rate
+        return {
+            "dailyBudget": np.round(daily_budgets, 2).tolist(),
+            "currency": (currency or BASE_CURRENCY).upper(),
+            "feasible": feasible.tolist(),
+            "minimumDailyCost": np.round(floors.sum(axis=1) * rate, 2).tolist(),
+            "categoryAllocation": {
+                category: np.round(allocation[:, c], 2).tolist()
+                for c, category in enumerate(ALLOCATION_CATEGORIES)
+            }
+        }
+    
+    def _budget_arrays(self, total_budgets, durations):
+        """Budgets and durations as float arrays of the budgets' shape, all finite and positive"""
+        try:
+            budgets = np.asarray(total_budgets, dtype=np.float64)
+            durations = np.asarray(durations, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Budgets and durations must be numbers")
+        try:
+            durations = np.broadcast_to(durations, budgets.shape)
+        except ValueError:
+            raise ValueError("durations must be one value or one per budget")
+        # NaN (a missing value) compares false, so check finiteness explicitly
+        if np.any(~np.isfinite(budgets) | (budgets <= 0)):
+            raise ValueError("Budgets must be positive numbers")
+        if np.any(~np.isfinite(durations) | (durations <= 0)):
+            raise ValueError("Durations must be positive numbers")
+        return budgets, durations
+    
+    def _allocation_bounds(self, destinations: List[str]):
+        """Daily floors (budget tier) and caps (luxury tier) per allocation category.
+        
+        Miscellaneous has no floor and no cap, so it absorbs any budget left
+        once every other category reaches its luxury cost.
+        """
+        tier_costs = np.stack([self._destination_tier_costs(destination) for destination in destinations])
+        budget_tier, luxury_tier = COST_TIERS.index("budget"), COST_TIERS.index("luxury")
+        floors = np.zeros((len(destinations), len(ALLOCATION_CATEGORIES)))
+        caps = np.full((len(destinations), len(ALLOCATION_CATEGORIES)), np.inf)
+        floors[:, :-1] = tier_costs[:, budget_tier]
+        caps[:, :-1] = tier_costs[:, luxury_tier]
+        return floors, caps
+    
+    def _allocation_weight_array(self, preferences: Dict[str, Any]) -> np.ndarray:
+        """Allocation weights for a preference dict, in ALLOCATION_CATEGORIES order.
+        
+        Preference flags multiply the default weights by their boosts and an
+        optional ``weights`` mapping multiplies them further, so combined
+        preferences can never produce a negative weight.
+        """
+        preferences = preferences or {}
+        if not isinstance(preferences, dict):
+            raise ValueError("preferences must be a dict")
+        weights = dict(self.allocation_weights)
+        for flag, boosts in self.preference_boosts.items():
+            if preferences.get(flag):
+                for category, boost in boosts.items():
+                    weights[category] *= boost
+        for category, multiplier in (preferences.get("weights") or {}).items():
+            if category not in weights:
+                raise ValueError(f"Unknown allocation category: {category}")
+            if (isinstance(multiplier, bool) or not isinstance(multiplier, (int, float))
+                    or not np.isfinite(multiplier)):
+                raise ValueError(f"Allocation weight for {category} must be a finite number")
+            if multiplier < 0:
+                raise ValueError("Allocation weights must not be negative")
+            weights[category] *= multiplier
+        return np.array([weights[category] for category in ALLOCATION_CATEGORIES])
+    
+    def _solve_allocation(self, budgets: np.ndarray, floors: np.ndarray, caps: np.ndarray,
+                          weights: np.ndarray):
+        """Split each budget across categories by weighted water-filling.
+        
+        Solves ``x = clip(floors + lam * weights, floors, caps)`` with
+        ``sum(x) == budget`` for every row at once: every category gets at
+        least its floor, the budget above the floors is shared in proportion
+        to the weights, and categories stop growing at their caps. ``lam`` is
+        found exactly by evaluating the spend at each category's saturation
+        point and interpolating within the bracketing linear segment. Budgets
+        below the sum of floors are infeasible and get the floors scaled
+        down proportionally. Returns ``(allocation, feasible)``.
+        """
+        minimum = floors.sum(axis=1)
+        feasible = budgets >= minimum
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            saturation = np.where(weights > 0, (caps - floors) / weights, np.inf)
+        breakpoints = np.concatenate([np.zeros((len(budgets), 1)), saturation], axis=1)
+        breakpoints[~np.isfinite(breakpoints)] = 0
+        
+        def spend(lam):
+            return np.minimum(floors[:, None, :] + lam[..., None] * weights[:, None, :], caps[:, None, :]).sum(axis=-1)
+        
+        # Start from the last breakpoint whose spend still fits the budget
+        reachable = spend(breakpoints) <= budgets[:, None]
+        start = np.where(reachable, breakpoints, -np.inf).max(axis=1)
+        start = np.where(feasible, start, 0)
+        start_spend = spend(start[:, None])[:, 0]
+        active_weight = np.where(saturation > start[:, None], weights, 0).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.where(active_weight > 0, (budgets - start_spend) / active_weight, 0)
+        lam = start + step
+        
+        allocation = np.minimum(floors + lam[:, None] * weights, caps)
+        # Anything left once every weighted category is capped goes to miscellaneous
+        allocation[:, -1] += budgets - allocation.sum(axis=1)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.where(minimum > 0, budgets / minimum, 0)
+        allocation = np.where(feasible[:, None], allocation, floors * scale[:, None])
+        return allocation, feasible
+    
     def _generate_optimization_recommendations(self, destination: str, 
                                             category_budgets: Dict[str, float],
                                             preferences: Dict[str, Any]) -> List[str]:
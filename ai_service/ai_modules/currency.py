@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+import time
+import uuid
+import numpy as np
+from typing import Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Currency every built-in and database cost is expressed in
+BASE_CURRENCY = "USD"
+
+
+class ExchangeRates:
+    """Immutable snapshot of exchange rates as a dense conversion matrix.
+
+    ``matrix[i, j]`` converts an amount in ``currencies[i]`` into
+    ``currencies[j]``, so converting any array of amounts is one multiply.
+    """
+
+    def __init__(self, currencies: List[str], matrix: np.ndarray, version: str = None):
+        self.currencies = currencies
+        self.matrix = matrix
+        self.version = version
+        # Unique per loaded snapshot, so results converted with it can be keyed on it
+        self.token = uuid.uuid4().hex
+        self.index = {currency: i for i, currency in enumerate(currencies)}
+
+    @classmethod
+    def from_rates(cls, base: str, rates: Dict[str, float], version: str = None) -> "ExchangeRates":
+        """Build the matrix from units of each currency per one unit of ``base``"""
+        rates = {currency.upper(): float(rate) for currency, rate in rates.items()}
+        rates[base.upper()] = 1.0
+        if any(rate <= 0 for rate in rates.values()):
+            raise ValueError("Exchange rates must be positive")
+        currencies = sorted(rates)
+        per_base = np.array([rates[currency] for currency in currencies])
+        return cls(currencies, per_base[None, :] / per_base[:, None], version)
+
+    @classmethod
+    def load(cls, path: str) -> "ExchangeRates":
+        """Read a ``{"base": "USD", "rates": {"EUR": 0.92, ...}}`` rates file"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        version = data.get("updatedAt") or str(os.stat(path).st_mtime_ns)
+        return cls.from_rates(data.get("base", BASE_CURRENCY), data["rates"], version)
+
+    def rate(self, source: str, target: str) -> float:
+        """Multiplier converting ``source`` amounts into ``target``"""
+        try:
+            return float(self.matrix[self.index[source.upper()], self.index[target.upper()]])
+        except (KeyError, AttributeError):
+            raise ValueError(f"Unsupported currency conversion: {source} -> {target}")
+
+
+class CurrencyConverter:
+    """Exchange rates backed by a local rates file, refreshed atomically.
+
+    The file is re-read when its modification time changes, checked at most
+    every ``refresh_interval`` seconds. A refresh builds a complete new
+    ExchangeRates snapshot and swaps the reference, so a request that pins
+    ``rates`` once never sees a half-updated matrix. Without a file only the
+    base currency is available.
+    """
+
+    def __init__(self, rates_path: str = None, refresh_interval: float = 60.0):
+        self.rates_path = rates_path
+        self.refresh_interval = refresh_interval
+        self._refresh_lock = threading.Lock()
+        self._last_refresh_check = time.monotonic()
+        self._mtime = None
+        self._rates = ExchangeRates.from_rates(BASE_CURRENCY, {}, BASE_CURRENCY)
+        if rates_path:
+            self.refresh()
+
+    @property
+    def rates(self) -> ExchangeRates:
+        """Current snapshot, after checking for a newer rates file if due"""
+        if self.rates_path:
+            now = time.monotonic()
+            if now - self._last_refresh_check >= self.refresh_interval:
+                self._last_refresh_check = now
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Error refreshing exchange rates: {str(e)}")
+        return self._rates
+
+    def refresh(self) -> bool:
+        """Load the rates file if it changed; returns whether rates were swapped"""
+        with self._refresh_lock:
+            mtime = os.stat(self.rates_path).st_mtime_ns
+            if mtime == self._mtime:
+                return False
+            rates = ExchangeRates.load(self.rates_path)
+            self._rates, self._mtime = rates, mtime
+        logger.info(f"Loaded exchange rates {rates.version} for {len(rates.currencies)} currencies")
+        return True
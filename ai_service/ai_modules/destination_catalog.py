@@ -0,0 +1,294 @@
+import uuid
+import numpy as np
+from typing import Dict, List, Any, Iterable
+import logging
+from .columnar import StringColumn, HashIndex, string_columns, read_string_column, publish, open_version
+
+logger = logging.getLogger(__name__)
+
+# Ordinal rank of each cost level; unknown levels are treated as "medium"
+COST_LEVELS = {"low": 1, "medium": 2, "high": 3}
+
+CATEGORICAL_FIELDS = ["category", "region", "climate", "cost_level"]
+LIST_FIELDS = ["best_seasons", "activities", "travel_styles"]
+NUMERIC_FIELDS = ["rating", "popularity"]
+# List fields that get an inverted term -> destination index
+INDEXED_FIELDS = ["activities"]
+
+# Relative weight of each attribute in the similarity embedding
+EMBEDDING_FIELD_WEIGHTS = {
+    "category": 1.0,
+    "region": 1.0,
+    "climate": 1.0,
+    "cost_level": 1.0,
+    "activities": 1.5,
+    "travel_styles": 1.0
+}
+# Feature spaces wider than this are randomly projected down to it
+EMBEDDING_MAX_DIM = 128
+
+
+class DestinationCatalog:
+    """Columnar, NumPy-backed encoding of the destination database.
+
+    Categorical attributes are stored as integer codes into a vocabulary,
+    list attributes as ragged (offsets, codes) pairs plus a packed uint64
+    bitmask per destination, so a request can be scored against the whole
+    catalog with a handful of array operations. Indexed list fields also
+    carry postings (term -> sorted destination rows) and a substring
+    expansion table (substring -> term codes, stored as columns like the
+    rest), so interest matching costs O(matches), not O(catalog).
+
+    Catalogs can be published to disk with ``save`` and memory-mapped with
+    ``open``; names, the name -> row index and the similarity embeddings are
+    columns too, so workers share the whole catalog through the page cache.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], vocabularies: Dict[str, List[str]],
+                 version: str = None):
+        self.columns = columns
+        self.vocabularies = vocabularies
+        self.version = version
+        # Unique per loaded catalog, so results derived from it can be keyed on it
+        self.token = version or uuid.uuid4().hex
+        self.names, self.index = read_string_column("names", columns)
+        self._term_codes = {
+            field: {term: code for code, term in enumerate(vocab)}
+            for field, vocab in vocabularies.items()
+        }
+        cost_vocab = vocabularies["cost_level"]
+        cost_lookup = np.array([COST_LEVELS.get(level, 2) for level in cost_vocab] or [2], dtype=np.int8)
+        self.cost_ranks = cost_lookup[columns["cost_level"]]
+        for field in INDEXED_FIELDS:
+            if f"{field}_substrings_blob" not in columns:
+                # Built here for new catalogs and ones published without it
+                columns.update(_build_substring_expansions(field, vocabularies[field]))
+        self._expansions = {
+            field: read_string_column(f"{field}_substrings", columns)[1] for field in INDEXED_FIELDS
+        }
+
+    @classmethod
+    def from_destinations(cls, destinations: Dict[str, Dict[str, Any]]) -> "DestinationCatalog":
+        """Encode a {name: attributes} mapping into columnar arrays"""
+        records = list(destinations.values())
+        names = StringColumn.from_strings(destinations.keys())
+        columns = string_columns("names", names, HashIndex.build(names))
+        vocabularies = {}
+
+        for field in CATEGORICAL_FIELDS:
+            vocab, codes = _build_vocabulary(record[field] for record in records)
+            vocabularies[field] = vocab
+            columns[field] = np.array(codes, dtype=np.int32)
+
+        for field in LIST_FIELDS:
+            vocab, codes = _build_vocabulary(
+                term for record in records for term in record[field]
+            )
+            lengths = np.array([len(record[field]) for record in records], dtype=np.int64)
+            offsets = np.zeros(len(records) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            vocabularies[field] = vocab
+            columns[f"{field}_offsets"] = offsets
+            columns[f"{field}_codes"] = np.array(codes, dtype=np.int32)
+            columns[f"{field}_mask"] = _build_masks(offsets, columns[f"{field}_codes"], len(vocab))
+            if field in INDEXED_FIELDS:
+                postings_offsets, postings = _build_postings(offsets, columns[f"{field}_codes"], len(vocab))
+                columns[f"{field}_postings_offsets"] = postings_offsets
+                columns[f"{field}_postings"] = postings
+
+        for field in NUMERIC_FIELDS:
+            columns[field] = np.array([record[field] for record in records], dtype=np.float64)
+
+        return cls(columns, vocabularies)
+
+    @classmethod
+    def open(cls, root: str, version: str = None) -> "DestinationCatalog":
+        """Memory-map a published catalog (the current version by default)"""
+        columns, manifest = open_version(root, version)
+        logger.info(f"Opened destination catalog {manifest['version']} with {manifest['size']} destinations")
+        return cls(columns, manifest["vocabularies"], manifest["version"])
+
+    def save(self, root: str) -> str:
+        """Publish this catalog (with its embeddings) as a new current version under ``root``"""
+        columns = dict(self.columns, embeddings=self.embeddings())
+        return publish(root, columns, {"size": len(self), "vocabularies": self.vocabularies})
+
+    def embeddings(self) -> np.ndarray:
+        """Unit-norm float32 feature vector per destination, built on first use"""
+        if "embeddings" not in self.columns:
+            self.columns["embeddings"] = self.build_embeddings()
+        return self.columns["embeddings"]
+
+    def build_embeddings(self, max_dim: int = EMBEDDING_MAX_DIM, seed: int = 0) -> np.ndarray:
+        """Encode every destination as a dense, L2-normalized feature vector.
+
+        Categorical fields are one-hot, list fields multi-hot scaled so each
+        field block has the norm of its EMBEDDING_FIELD_WEIGHTS weight, and
+        cost level is placed on a quarter circle so adjacent levels stay
+        closer than low vs high. If the feature space is wider than
+        ``max_dim`` it is reduced with a seeded Gaussian random projection,
+        which approximately preserves cosine similarity.
+        """
+        n = len(self)
+        widths = {field: len(self.vocabularies[field]) for field in EMBEDDING_FIELD_WEIGHTS}
+        widths["cost_level"] = 2
+        n_features = sum(widths.values())
+        if n_features <= max_dim:
+            basis = np.eye(n_features, dtype=np.float32)
+        else:
+            rng = np.random.default_rng(seed)
+            basis = (rng.standard_normal((n_features, max_dim)) / np.sqrt(max_dim)).astype(np.float32)
+
+        embeddings = np.zeros((n, basis.shape[1]), dtype=np.float32)
+        offset = 0
+        for field, weight in EMBEDDING_FIELD_WEIGHTS.items():
+            if field == "cost_level":
+                angle = (self.cost_ranks - 1) * (np.pi / 4)
+                embeddings += weight * (np.cos(angle)[:, None] * basis[offset]
+                                        + np.sin(angle)[:, None] * basis[offset + 1]).astype(np.float32)
+            elif field in CATEGORICAL_FIELDS:
+                embeddings += weight * basis[offset + self.columns[field]]
+            else:
+                self._add_multi_hot(embeddings, field, weight, basis[offset:offset + widths[field]])
+            offset += widths[field]
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings /= np.maximum(norms, np.float32(1e-12))
+        return embeddings
+
+    def _add_multi_hot(self, embeddings: np.ndarray, field: str, weight: float, basis: np.ndarray,
+                       chunk_bytes: int = 32 * 1024 * 1024):
+        """Add a list field's weighted multi-hot block, projected through ``basis``, chunk by chunk"""
+        offsets = self.columns[f"{field}_offsets"]
+        codes = self.columns[f"{field}_codes"]
+        counts = np.diff(offsets)
+        scale = (weight / np.sqrt(np.maximum(counts, 1))).astype(np.float32)
+        chunk_rows = max(1, chunk_bytes // (4 * max(len(basis), 1)))
+        for start in range(0, len(self), chunk_rows):
+            end = min(start + chunk_rows, len(self))
+            block = np.zeros((end - start, len(basis)), dtype=np.float32)
+            rows = np.repeat(np.arange(end - start), counts[start:end])
+            block[rows, codes[offsets[start]:offsets[end]]] = scale[start + rows]
+            embeddings[start:end] += block @ basis
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Return the attribute dict for a destination name"""
+        return self.record(self.index[name])
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """Decode row ``i`` back into the original attribute dict"""
+        record = {}
+        for field in CATEGORICAL_FIELDS:
+            record[field] = self.vocabularies[field][self.columns[field][i]]
+        for field in LIST_FIELDS:
+            record[field] = self.list_terms(field, i)
+        for field in NUMERIC_FIELDS:
+            record[field] = float(self.columns[field][i])
+        return record
+
+    def list_terms(self, field: str, i: int) -> List[str]:
+        """Return the terms of a list field for row ``i`` in their original order"""
+        offsets = self.columns[f"{field}_offsets"]
+        codes = self.columns[f"{field}_codes"][offsets[i]:offsets[i + 1]]
+        vocab = self.vocabularies[field]
+        return [vocab[code] for code in codes]
+
+    def category_code(self, field: str, term: str) -> int:
+        """Return the vocabulary code of a categorical term, or -1 if unknown"""
+        return self._term_codes[field].get(term, -1)
+
+    def terms_mask(self, field: str, terms: Iterable[str]) -> np.ndarray:
+        """Build a query bitmask selecting exact vocabulary terms of a list field"""
+        codes = [self._term_codes[field][term] for term in terms if term in self._term_codes[field]]
+        return self._codes_mask(field, codes)
+
+    def expand_substring(self, field: str, needle: str) -> List[int]:
+        """Return codes of every indexed term containing ``needle`` (case-insensitive)"""
+        row = self._expansions[field].get(needle.lower())
+        if row is None:
+            return []
+        offsets = self.columns[f"{field}_substring_offsets"]
+        return self.columns[f"{field}_substring_codes"][offsets[row]:offsets[row + 1]].tolist()
+
+    def postings(self, field: str, codes: Iterable[int]) -> np.ndarray:
+        """Return the sorted, de-duplicated rows carrying any of the given term codes"""
+        offsets = self.columns[f"{field}_postings_offsets"]
+        postings = self.columns[f"{field}_postings"]
+        lists = [postings[offsets[code]:offsets[code + 1]] for code in codes]
+        if not lists:
+            return np.zeros(0, dtype=postings.dtype)
+        if len(lists) == 1:
+            return lists[0]
+        return np.unique(np.concatenate(lists))
+
+    def has_any(self, field: str, query_mask: np.ndarray) -> np.ndarray:
+        """Boolean vector: does each destination carry at least one term of ``query_mask``"""
+        masks = self.columns[f"{field}_mask"]
+        return np.bitwise_and(masks, query_mask).any(axis=1)
+
+    def _codes_mask(self, field: str, codes: List[int]) -> np.ndarray:
+        mask = np.zeros(self.columns[f"{field}_mask"].shape[1], dtype=np.uint64)
+        for code in codes:
+            mask[code // 64] |= np.uint64(1) << np.uint64(code % 64)
+        return mask
+
+
+def _build_vocabulary(values: Iterable[str]):
+    """Assign codes to terms in order of first appearance"""
+    vocab = {}
+    codes = []
+    for value in values:
+        codes.append(vocab.setdefault(value, len(vocab)))
+    return list(vocab), codes
+
+
+def _build_postings(offsets: np.ndarray, codes: np.ndarray, n_terms: int):
+    """Invert ragged row -> term codes into CSR-style term -> sorted rows postings"""
+    n_rows = len(offsets) - 1
+    rows = np.repeat(np.arange(n_rows, dtype=np.int64), np.diff(offsets))
+    # Sort by (term, row) and drop rows that list the same term twice
+    keys = np.unique(codes.astype(np.int64) * max(n_rows, 1) + rows)
+    postings_offsets = np.zeros(n_terms + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // max(n_rows, 1), minlength=n_terms), out=postings_offsets[1:])
+    return postings_offsets, keys % max(n_rows, 1)
+
+
+def _build_substring_expansions(field: str, vocab: List[str]) -> Dict[str, np.ndarray]:
+    """Columns mapping every lowercase substring of each term to the codes of terms containing it.
+
+    The substrings are an indexed string column; their codes are CSR-style
+    ``{field}_substring_offsets`` / ``{field}_substring_codes`` in that order.
+    """
+    expansions = {}
+    for code, term in enumerate(vocab):
+        term = term.lower()
+        substrings = {term[start:end] for start in range(len(term) + 1) for end in range(start, len(term) + 1)}
+        for substring in substrings:
+            expansions.setdefault(substring, []).append(code)
+
+    substrings = StringColumn.from_strings(expansions)
+    offsets = np.zeros(len(expansions) + 1, dtype=np.int64)
+    np.cumsum([len(codes) for codes in expansions.values()], out=offsets[1:])
+    columns = string_columns(f"{field}_substrings", substrings, HashIndex.build(substrings))
+    columns[f"{field}_substring_offsets"] = offsets
+    columns[f"{field}_substring_codes"] = np.array(
+        [code for codes in expansions.values() for code in codes], dtype=np.int32
+    )
+    return columns
+
+
+def _build_masks(offsets: np.ndarray, codes: np.ndarray, n_terms: int) -> np.ndarray:
+    """Pack ragged term codes into one uint64 bitmask row per destination"""
+    n_rows = len(offsets) - 1
+    n_words = max(1, (n_terms + 63) // 64)
+    masks = np.zeros((n_rows, n_words), dtype=np.uint64)
+    rows = np.repeat(np.arange(n_rows), np.diff(offsets))
+    bits = np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64))
+    np.bitwise_or.at(masks, (rows, codes // 64), bits)
+    return masks
@@ -1,54 +1,112 @@
 import json
+import heapq
+import math
 import random
+import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
 import logging
+from .result_cache import ResultCache, canonical_key
 
 logger = logging.getLogger(__name__)
 
+# Itinerary fields sent in the header and tips chunks of a streamed itinerary;
+# every day is a chunk of its own in between
+ITINERARY_HEADER_FIELDS = ["title", "destination", "startDate", "endDate", "duration", "travelStyle", "budget"]
+ITINERARY_TIPS_FIELDS = ["estimatedTotalCost", "travelTips", "recommendations"]
+
+# Daily schedule: attractions run from DAY_START_HOUR and must be over by
+# DAY_END_HOUR, with TRAVEL_HOURS after each and one lunch break per day
+DAY_START_HOUR = 9
+DAY_END_HOUR = 21
+TRAVEL_HOURS = 1
+LUNCH_HOURS = 1
+MAX_DAY_ATTRACTIONS = 3
+
+# The scheduler tracks a day's budget in whole currency units, coarsened to at
+# most this many steps; costs round up to whole steps so a day never goes
+# over budget
+BUDGET_STEPS = 100
+
+# Routing: great-circle distances between attractions, walking legs up to
+# WALKING_DISTANCE_KM where the travel style allows, and average door-to-door
+# speed (km/h) and fares per transport mode
+EARTH_RADIUS_KM = 6371.0
+WALKING_DISTANCE_KM = 1.5
+TRANSPORT_MODES = {
+    "walking": {"speed": 4.5, "fare": 0, "perKm": 0, "perPerson": False},
+    "hiking": {"speed": 4.0, "fare": 0, "perKm": 0, "perPerson": False},
+    "bicycle": {"speed": 14.0, "fare": 0, "perKm": 0, "perPerson": False},
+    "public transport": {"speed": 20.0, "fare": 5, "perKm": 0, "perPerson": True},
+    "taxi": {"speed": 25.0, "fare": 5, "perKm": 2, "perPerson": False},
+    "private car": {"speed": 25.0, "fare": 20, "perKm": 2, "perPerson": False}
+}
+
+
+def distance_matrix(origins: np.ndarray, destinations: np.ndarray) -> np.ndarray:
+    """Haversine distances in km between every (lat, lon) row of ``origins`` and of ``destinations``"""
+    origins, destinations = np.radians(origins), np.radians(destinations)
+    lat1, lon1 = origins[:, 0, None], origins[:, 1, None]
+    lat2, lon2 = destinations[None, :, 0], destinations[None, :, 1]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
 class ItineraryGenerator:
-    def __init__(self):
+    def __init__(self, cache_size: int = 256):
         self.destination_data = self._load_destination_data()
         self.activity_templates = self._load_activity_templates()
+        self.transport_options = self._load_transport_options()
+        self.attraction_indexes = {
+            destination: self._build_attraction_index(dest_data.get("attractions", []))
+            for destination, dest_data in self.destination_data.items()
+        }
+        
+        # Generation is deterministic in its inputs, so cached itineraries
+        # never expire and are only evicted by size
+        self.itinerary_cache = ResultCache(cache_size, ttl=None)
         
     def _load_destination_data(self) -> Dict[str, Any]:
         """Load destination-specific data and attractions"""
         return {
             "Paris": {
+                "location": {"lat": 48.8566, "lon": 2.3522},
                 "attractions": [
-                    {"name": "Eiffel Tower", "type": "landmark", "duration": 2, "cost": 30},
-                    {"name": "Louvre Museum", "type": "museum", "duration": 3, "cost": 20},
-                    {"name": "Notre-Dame Cathedral", "type": "religious", "duration": 1, "cost": 0},
-                    {"name": "Arc de Triomphe", "type": "landmark", "duration": 1, "cost": 15},
-                    {"name": "Champs-Élysées", "type": "shopping", "duration": 2, "cost": 0},
-                    {"name": "Montmartre", "type": "cultural", "duration": 2, "cost": 0},
-                    {"name": "Seine River Cruise", "type": "activity", "duration": 1, "cost": 25}
+                    {"name": "Eiffel Tower", "type": "landmark", "duration": 2, "cost": 30, "lat": 48.8584, "lon": 2.2945},
+                    {"name": "Louvre Museum", "type": "museum", "duration": 3, "cost": 20, "lat": 48.8606, "lon": 2.3376},
+                    {"name": "Notre-Dame Cathedral", "type": "religious", "duration": 1, "cost": 0, "lat": 48.853, "lon": 2.3499},
+                    {"name": "Arc de Triomphe", "type": "landmark", "duration": 1, "cost": 15, "lat": 48.8738, "lon": 2.295},
+                    {"name": "Champs-Élysées", "type": "shopping", "duration": 2, "cost": 0, "lat": 48.8698, "lon": 2.3078},
+                    {"name": "Montmartre", "type": "cultural", "duration": 2, "cost": 0, "lat": 48.8867, "lon": 2.3431},
+                    {"name": "Seine River Cruise", "type": "activity", "duration": 1, "cost": 25, "lat": 48.8599, "lon": 2.2936}
                 ],
                 "restaurants": ["Le Jules Verne", "L'Astrance", "Le Comptoir du Relais"],
                 "hotels": ["Hotel Ritz Paris", "Le Bristol", "Hotel Plaza Athenee"],
                 "transportation": ["Metro", "Bus", "Walking", "Taxi"]
             },
             "Tokyo": {
+                "location": {"lat": 35.6812, "lon": 139.7671},
                 "attractions": [
-                    {"name": "Senso-ji Temple", "type": "religious", "duration": 2, "cost": 0},
-                    {"name": "Tokyo Skytree", "type": "landmark", "duration": 2, "cost": 25},
-                    {"name": "Shibuya Crossing", "type": "cultural", "duration": 1, "cost": 0},
-                    {"name": "Tsukiji Fish Market", "type": "food", "duration": 2, "cost": 0},
-                    {"name": "Meiji Shrine", "type": "religious", "duration": 1, "cost": 0},
-                    {"name": "Tokyo Disneyland", "type": "entertainment", "duration": 8, "cost": 80}
+                    {"name": "Senso-ji Temple", "type": "religious", "duration": 2, "cost": 0, "lat": 35.7148, "lon": 139.7967},
+                    {"name": "Tokyo Skytree", "type": "landmark", "duration": 2, "cost": 25, "lat": 35.7101, "lon": 139.8107},
+                    {"name": "Shibuya Crossing", "type": "cultural", "duration": 1, "cost": 0, "lat": 35.6595, "lon": 139.7005},
+                    {"name": "Tsukiji Fish Market", "type": "food", "duration": 2, "cost": 0, "lat": 35.6655, "lon": 139.7707},
+                    {"name": "Meiji Shrine", "type": "religious", "duration": 1, "cost": 0, "lat": 35.6764, "lon": 139.6993},
+                    {"name": "Tokyo Disneyland", "type": "entertainment", "duration": 8, "cost": 80, "lat": 35.6329, "lon": 139.8804}
                 ],
                 "restaurants": ["Sukiyabashi Jiro", "Narisawa", "Den"],
                 "hotels": ["Park Hyatt Tokyo", "Aman Tokyo", "Mandarin Oriental"],
                 "transportation": ["JR Rail", "Metro", "Walking", "Taxi"]
             },
             "New York": {
+                "location": {"lat": 40.7549, "lon": -73.984},
                 "attractions": [
-                    {"name": "Statue of Liberty", "type": "landmark", "duration": 3, "cost": 25},
-                    {"name": "Central Park", "type": "nature", "duration": 2, "cost": 0},
-                    {"name": "Times Square", "type": "cultural", "duration": 1, "cost": 0},
-                    {"name": "Metropolitan Museum", "type": "museum", "duration": 3, "cost": 25},
-                    {"name": "Empire State Building", "type": "landmark", "duration": 2, "cost": 40},
-                    {"name": "Broadway Show", "type": "entertainment", "duration": 3, "cost": 150}
+                    {"name": "Statue of Liberty", "type": "landmark", "duration": 3, "cost": 25, "lat": 40.6892, "lon": -74.0445},
+                    {"name": "Central Park", "type": "nature", "duration": 2, "cost": 0, "lat": 40.7829, "lon": -73.9654},
+                    {"name": "Times Square", "type": "cultural", "duration": 1, "cost": 0, "lat": 40.758, "lon": -73.9855},
+                    {"name": "Metropolitan Museum", "type": "museum", "duration": 3, "cost": 25, "lat": 40.7794, "lon": -73.9632},
+                    {"name": "Empire State Building", "type": "landmark", "duration": 2, "cost": 40, "lat": 40.7484, "lon": -73.9857},
+                    {"name": "Broadway Show", "type": "entertainment", "duration": 3, "cost": 150, "lat": 40.759, "lon": -73.9845}
                 ],
                 "restaurants": ["Le Bernardin", "Eleven Madison Park", "Per Se"],
                 "hotels": ["The Plaza", "Waldorf Astoria", "The Ritz-Carlton"],
@@ -101,78 +159,369 @@ class ItineraryGenerator:
             ]
         }
     
+    def _load_transport_options(self) -> Dict[str, List[str]]:
+        """Load transport modes by travel style, preferred mode first"""
+        return {
+            "budget": ["public transport", "walking"],
+            "luxury": ["private car", "taxi"],
+            "adventure": ["bicycle", "hiking"],
+            "cultural": ["public transport", "walking"],
+            "relaxation": ["private car", "walking"]
+        }
+    
     def generate(self, destination: str, start_date: str, end_date: str, 
                 budget: float, travel_style: str = "balanced", 
-                interests: List[str] = None, group_size: int = 1) -> Dict[str, Any]:
-        """Generate a complete travel itinerary"""
+                interests: List[str] = None, group_size: int = 1,
+                seed: Any = None) -> Dict[str, Any]:
+        """Generate a complete travel itinerary.
         
-        # Parse dates
+        Attractions are chosen with a private RNG seeded from the request key,
+        so identical requests get identical itineraries and repeats are served
+        from ``itinerary_cache``. A different ``seed`` gives an alternative
+        itinerary for the same trip.
+        """
+        key = self._itinerary_key(destination, start_date, end_date, budget, travel_style,
+                                  interests, group_size, seed)
+        itinerary = self.itinerary_cache.get(key)
+        if itinerary is None:
+            itinerary, days = {}, []
+            for kind, chunk in self._generate_chunks(destination, start_date, end_date, budget,
+                                                     travel_style, interests, group_size,
+                                                     random.Random(key)):
+                if kind == "day":
+                    days.append(chunk)
+                else:
+                    itinerary.update(chunk)
+            itinerary["days"] = days
+            self.itinerary_cache.set(key, itinerary)
+        return itinerary
+    
+    def generate_multi_city(self, destinations: List[str], start_date: str, end_date: str,
+                            budget: float, travel_style: str = "balanced",
+                            interests: List[str] = None, group_size: int = 1,
+                            seed: Any = None) -> Dict[str, Any]:
+        """Generate one itinerary visiting several cities over a date range.
+        
+        The trip starts in the first city; the others are visited in the
+        order of a short route between them when every city has a known
+        location, else in the given order. Days are split in proportion to
+        each city's matching attractions (at least one day each) and the
+        budget with them. Each city's days come from ``generate``, so they
+        share its cache and precomputed indexes, and the travel tips of all
+        cities are merged without duplicates.
+        """
+        destinations = list(dict.fromkeys(destinations or []))
+        if not destinations:
+            raise ValueError("destinations must not be empty")
         start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-        duration = (end_dt - start_dt).days + 1
+        duration = (datetime.strptime(end_date, "%Y-%m-%d") - start_dt).days + 1
         
-        # Get destination data
-        dest_data = self.destination_data.get(destination, self._get_generic_destination_data(destination))
+        # Visiting order and days per city
+        locations = [self.destination_data.get(city, {}).get("location") for city in destinations]
+        if len(destinations) > 2 and all(locations):
+            points = np.array([[location["lat"], location["lon"]] for location in locations])
+            order = [0] + [stop + 1 for stop in self._order_route(points[0], points[1:], round_trip=False)]
+            destinations, locations = [destinations[i] for i in order], [locations[i] for i in order]
+        city_days = self._split_days(duration, [self._attraction_pool_size(city, interests, travel_style)
+                                                for city in destinations])
         
-        # Generate daily itinerary
-        days = []
-        total_cost = 0
+        # Plan every city's stretch of the trip
+        stays = []
+        city_start = start_dt
+        for city, days in zip(destinations, city_days):
+            city_end = city_start + timedelta(days=days - 1)
+            stays.append({
+                "destination": city,
+                "startDate": city_start.strftime("%Y-%m-%d"),
+                "endDate": city_end.strftime("%Y-%m-%d"),
+                "duration": days
+            })
+            city_start = city_end + timedelta(days=1)
         
-        for day_num in range(1, duration + 1):
-            current_date = start_dt + timedelta(days=day_num - 1)
-            
-            # Generate day activities
-            day_activities = self._generate_day_activities(
-                destination, dest_data, travel_style, interests, budget, day_num
+        # Stitch the cities into one trip, numbering days across it
+        days, travel_tips, recommendations, total_cost = [], [], [], 0
+        for stay in stays:
+            itinerary = self.generate(
+                stay["destination"], stay["startDate"], stay["endDate"],
+                budget * stay["duration"] / duration if budget is not None else None,
+                travel_style, interests, group_size, seed
             )
+            stay["firstDay"] = len(days) + 1
             
-            # Calculate day cost
-            day_cost = sum(activity.get('cost', 0) for activity in day_activities)
-            total_cost += day_cost
+            # Copies, so the cached city itinerary keeps its own numbering
+            for day in itinerary["days"]:
+                days.append(dict(day, dayNumber=len(days) + 1, destination=stay["destination"]))
+            total_cost += itinerary["estimatedTotalCost"]
+            travel_tips.extend(itinerary["travelTips"])
+            recommendations.extend(itinerary["recommendations"])
+        
+        return {
+            "title": f"{' - '.join(destinations)} Adventure",
+            "destinations": destinations,
+            "startDate": start_date,
+            "endDate": end_date,
+            "duration": duration,
+            "travelStyle": travel_style,
+            "budget": budget,
+            "estimatedTotalCost": total_cost,
+            "cities": stays,
+            "transfers": self._generate_transfers(stays, locations),
+            "days": days,
+            "travelTips": list(dict.fromkeys(travel_tips)),
+            "recommendations": list(dict.fromkeys(recommendations))
+        }
+    
+    def _split_days(self, duration: int, weights: List[float]) -> List[int]:
+        """Split ``duration`` days in proportion to ``weights``, at least one each"""
+        if duration < len(weights):
+            raise ValueError("The trip needs at least one day per destination")
+        weights = np.maximum(np.asarray(weights, dtype=np.float64), 1.0)
+        shares = (duration - len(weights)) * weights / weights.sum()
+        days = 1 + np.floor(shares).astype(np.int64)
+        
+        # Largest remainders get the days left over
+        leftover = duration - int(days.sum())
+        days[np.argsort(np.floor(shares) - shares, kind="stable")[:leftover]] += 1
+        return days.tolist()
+    
+    def _attraction_pool_size(self, destination: str, interests: List[str], travel_style: str) -> int:
+        """Number of attractions a destination offers for these interests"""
+        dest_data = self.destination_data.get(destination) or self._get_generic_destination_data(destination)
+        return len(self._filter_attractions(
+            dest_data.get("attractions", []), interests, travel_style, self.attraction_indexes.get(destination)
+        ))
+    
+    def _generate_transfers(self, stays: List[Dict], locations: List[Dict]) -> List[Dict]:
+        """Travel between consecutive cities, on the first day in each new city"""
+        transfers = []
+        for (origin, origin_location), (target, target_location) in zip(
+                zip(stays, locations), zip(stays[1:], locations[1:])):
+            transfer = {
+                "from": origin["destination"],
+                "to": target["destination"],
+                "date": target["startDate"],
+                "bookingStatus": "pending"
+            }
+            if origin_location and target_location:
+                distance = distance_matrix(
+                    np.array([[origin_location["lat"], origin_location["lon"]]]),
+                    np.array([[target_location["lat"], target_location["lon"]]])
+                )[0, 0]
+                transfer["distanceKm"] = round(float(distance), 1)
+            transfers.append(transfer)
+        return transfers
+    
+    def regenerate_days(self, itinerary: Dict[str, Any], day_numbers: List[int],
+                        interests: List[str] = None, group_size: int = 1,
+                        seed: Any = None) -> Dict[str, Any]:
+        """Regenerate the given days of an existing itinerary and keep the rest.
+        
+        New days avoid the attractions of the kept days of the same
+        destination until it runs out of attractions; the ones on the
+        replaced days are free to come back. Only the edited days are built, so the cost
+        grows with their number rather than with the trip length. Returns
+        the itinerary with those days replaced and its total cost updated.
+        """
+        days = list(itinerary.get("days") or [])
+        day_indexes = {day.get("dayNumber"): i for i, day in enumerate(days)}
+        try:
+            day_numbers = sorted({int(number) for number in day_numbers or []})
+        except (TypeError, ValueError):
+            raise ValueError("dayNumbers must be integers")
+        if not day_numbers:
+            raise ValueError("dayNumbers must not be empty")
+        unknown = [number for number in day_numbers if number not in day_indexes]
+        if unknown:
+            raise ValueError(f"Unknown day numbers: {', '.join(str(number) for number in unknown)}")
+        
+        trip_destination = itinerary.get("destination")
+        travel_style = itinerary.get("travelStyle", "balanced")
+        budget = itinerary.get("budget")
+        rng = random.Random(canonical_key(
+            "regenerate", trip_destination, itinerary.get("startDate"), itinerary.get("endDate"),
+            day_numbers, budget, travel_style, interests or [], group_size, seed
+        ))
+        
+        edited = set(day_numbers)
+        plans, total_cost = {}, itinerary.get("estimatedTotalCost")
+        for number in day_numbers:
+            old_day = days[day_indexes[number]]
+            destination = old_day.get("destination") or trip_destination
+            if destination not in plans:
+                plans[destination] = self._plan_trip(destination, travel_style, interests, rng)
+                self._mark_used(plans[destination], [
+                    day for day in days
+                    if day.get("dayNumber") not in edited
+                    and (day.get("destination") or trip_destination) == destination
+                ])
             
-            days.append({
-                "dayNumber": day_num,
-                "date": current_date.strftime("%Y-%m-%d"),
-                "activities": day_activities,
-                "accommodation": self._generate_accommodation(destination, travel_style, budget),
-                "transportation": self._generate_transportation(destination, travel_style),
-                "estimatedCost": day_cost
-            })
+            day = self._build_day(
+                destination, plans[destination], number, old_day.get("date"),
+                self._daily_activity_budget(budget, len(days), destination, travel_style, group_size),
+                travel_style, budget, group_size
+            )
+            if "destination" in old_day:
+                day["destination"] = old_day["destination"]
+            if total_cost is not None:
+                total_cost += day["estimatedCost"] - old_day.get("estimatedCost", 0)
+            days[day_indexes[number]] = day
         
-        # Generate travel tips
-        travel_tips = self.generate_travel_tips(destination, travel_style, interests or [])
+        regenerated = dict(itinerary, days=days, regeneratedDays=day_numbers)
+        if total_cost is not None:
+            regenerated["estimatedTotalCost"] = total_cost
+        return regenerated
+    
+    def _mark_used(self, plan: Dict[str, Any], days: List[Dict]):
+        """Mark the plan's attractions already scheduled on ``days`` as used"""
+        names = {activity.get("activity") for day in days for activity in day.get("activities") or []}
+        used = plan["used"]
+        for position, attraction in enumerate(plan["ranked"]):
+            if attraction["name"] in names:
+                used[position] = True
+    
+    def stream(self, destination: str, start_date: str, end_date: str,
+               budget: float, travel_style: str = "balanced",
+               interests: List[str] = None, group_size: int = 1,
+               seed: Any = None) -> Iterator[Dict[str, Any]]:
+        """Yield the itinerary ``generate`` would return as separate chunks.
         
-        return {
+        The header comes first, then one chunk per day, then the tips along
+        with the total cost; each chunk's ``type`` is ``header``, ``day`` or
+        ``tips``. Days are built as they are consumed and not kept, so memory
+        stays flat whatever the trip length. A cached itinerary is streamed
+        from the cache, but streamed trips are not added to it.
+        """
+        key = self._itinerary_key(destination, start_date, end_date, budget, travel_style,
+                                  interests, group_size, seed)
+        itinerary = self.itinerary_cache.get(key)
+        if itinerary is not None:
+            chunks = self._split_itinerary(itinerary)
+        else:
+            chunks = self._generate_chunks(destination, start_date, end_date, budget, travel_style,
+                                           interests, group_size, random.Random(key))
+        for kind, chunk in chunks:
+            yield {"type": kind, **chunk}
+    
+    def _itinerary_key(self, destination: str, start_date: str, end_date: str,
+                       budget: float, travel_style: str, interests: List[str],
+                       group_size: int, seed: Any) -> str:
+        """Canonical cache key, which also seeds the request's RNG"""
+        return canonical_key(destination, start_date, end_date, budget, travel_style,
+                             interests or [], group_size, seed)
+    
+    def _generate_chunks(self, destination: str, start_date: str, end_date: str,
+                         budget: float, travel_style: str, interests: List[str],
+                         group_size: int, rng: random.Random) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Build an itinerary lazily as (kind, chunk) pairs, drawing every random choice from ``rng``"""
+        
+        # Parse dates
+        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+        end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+        duration = (end_dt - start_dt).days + 1
+        
+        yield "header", {
             "title": f"{destination} Adventure",
             "destination": destination,
             "startDate": start_date,
             "endDate": end_date,
             "duration": duration,
             "travelStyle": travel_style,
-            "budget": budget,
+            "budget": budget
+        }
+        
+        # Rank the whole trip's candidates once for every day
+        plan = self._plan_trip(destination, travel_style, interests, rng)
+        
+        # Spread the trip budget over the days, net of lodging and lunch
+        activity_budget = self._daily_activity_budget(
+            budget, duration, destination, travel_style, group_size
+        )
+        
+        # Generate daily itinerary
+        total_cost = 0
+        
+        for day_num in range(1, duration + 1):
+            current_date = start_dt + timedelta(days=day_num - 1)
+            day = self._build_day(destination, plan, day_num, current_date.strftime("%Y-%m-%d"),
+                                  activity_budget, travel_style, budget, group_size)
+            total_cost += day["estimatedCost"]
+            yield "day", day
+        
+        # Generate travel tips
+        yield "tips", {
             "estimatedTotalCost": total_cost,
-            "days": days,
-            "travelTips": travel_tips,
+            "travelTips": self.generate_travel_tips(destination, travel_style, interests or []),
             "recommendations": self._generate_recommendations(destination, travel_style, interests)
         }
     
-    def _generate_day_activities(self, destination: str, dest_data: Dict, 
-                               travel_style: str, interests: List[str], 
-                               budget: float, day_num: int) -> List[Dict]:
-        """Generate activities for a specific day"""
-        activities = []
-        available_attractions = dest_data.get("attractions", [])
+    def _plan_trip(self, destination: str, travel_style: str, interests: List[str],
+                   rng: random.Random) -> Dict[str, Any]:
+        """Rank a destination's candidates for one trip and set up their allocation state"""
+        
+        # Get destination data
+        dest_data = self.destination_data.get(destination, self._get_generic_destination_data(destination))
+        
+        # Filter attractions based on interests and travel style, then rank
+        all_attractions = dest_data.get("attractions", [])
+        attractions = self._filter_attractions(
+            all_attractions, interests, travel_style,
+            self.attraction_indexes.get(destination)
+        )
+        ranked = self._rank_attractions(all_attractions, attractions, rng)
         
-        # Filter attractions based on interests and travel style
-        filtered_attractions = self._filter_attractions(available_attractions, interests, travel_style)
+        # Coordinates of the candidates and the hotel, when every attraction has them
+        points = self._attraction_points(ranked)
+        return {
+            "ranked": ranked,
+            "poolSize": len(attractions),
+            "used": [False] * len(ranked),
+            "points": points,
+            "hotel": self._hotel_point(dest_data, points)
+        }
+    
+    def _build_day(self, destination: str, plan: Dict[str, Any], day_num: int, date: str,
+                   activity_budget: float, travel_style: str, budget: float,
+                   group_size: int) -> Dict[str, Any]:
+        """Build one day from the trip plan's attractions not yet used"""
+        ranked, points, hotel = plan["ranked"], plan["points"], plan["hotel"]
         
-        # Select activities for the day
-        selected_attractions = random.sample(
-            filtered_attractions, 
-            min(3, len(filtered_attractions))
+        # Generate day activities from attractions not yet used on the trip,
+        # clustered and put in visiting order when coordinates are known
+        positions = self._allocate_day(ranked, plan["poolSize"], plan["used"], activity_budget,
+                                       group_size, points)
+        if points is not None and positions:
+            positions = [positions[i] for i in self._order_route(hotel, points[positions])]
+        day_activities = self._generate_day_activities(
+            destination, [ranked[position] for position in positions], travel_style, group_size
         )
         
-        current_time = 9  # Start at 9 AM
+        return {
+            "dayNumber": day_num,
+            "date": date,
+            "activities": day_activities,
+            "accommodation": self._generate_accommodation(destination, travel_style, budget),
+            "transportation": self._generate_route_transportation(
+                destination, travel_style, hotel, day_activities, group_size
+            ),
+            "estimatedCost": sum(activity.get('estimatedCost', 0) for activity in day_activities)
+        }
+    
+    def _split_itinerary(self, itinerary: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Split a complete itinerary into the chunks ``_generate_chunks`` yields"""
+        yield "header", {field: itinerary[field] for field in ITINERARY_HEADER_FIELDS}
+        for day in itinerary["days"]:
+            yield "day", day
+        yield "tips", {field: itinerary[field] for field in ITINERARY_TIPS_FIELDS}
+    
+    def _generate_day_activities(self, destination: str, selected_attractions: List[Dict], 
+                               travel_style: str, group_size: int = 1) -> List[Dict]:
+        """Lay out a day's attractions from the morning, with travel time and lunch.
+        
+        Activity costs are for the whole group.
+        """
+        activities = []
+        
+        current_time = DAY_START_HOUR
         
         for i, attraction in enumerate(selected_attractions):
             activity = {
@@ -180,14 +529,16 @@ class ItineraryGenerator:
                 "activity": attraction["name"],
                 "location": destination,
                 "description": f"Visit {attraction['name']} - {attraction['type']} experience",
-                "estimatedCost": attraction["cost"],
+                "estimatedCost": attraction["cost"] * group_size,
                 "duration": attraction["duration"],
                 "type": attraction["type"],
                 "bookingStatus": "pending"
             }
+            if "lat" in attraction and "lon" in attraction:
+                activity["coordinates"] = {"lat": attraction["lat"], "lon": attraction["lon"]}
             
             activities.append(activity)
-            current_time += attraction["duration"] + 1  # Add 1 hour for travel between activities
+            current_time += attraction["duration"] + TRAVEL_HOURS  # Travel between activities
             
             # Add lunch break
             if i == 1:  # After second activity
@@ -196,28 +547,241 @@ class ItineraryGenerator:
                     "activity": "Lunch Break",
                     "location": destination,
                     "description": "Enjoy local cuisine",
-                    "estimatedCost": 15 if travel_style == "budget" else 50,
-                    "duration": 1,
+                    "estimatedCost": self._lunch_cost(travel_style) * group_size,
+                    "duration": LUNCH_HOURS,
                     "type": "food",
                     "bookingStatus": "pending"
                 })
-                current_time += 1
+                current_time += LUNCH_HOURS
         
         return activities
     
+    def _rank_attractions(self, attractions: List[Dict], pool: List[Dict],
+                          rng: random.Random) -> List[Dict]:
+        """Order a trip's candidates: the interest ``pool`` first, then the other attractions.
+        
+        Each part is shuffled with ``rng``, so a different seed spreads the
+        attractions over the days differently.
+        """
+        in_pool = {id(attraction) for attraction in pool}
+        ranked = list(pool)
+        rest = [attraction for attraction in attractions if id(attraction) not in in_pool]
+        rng.shuffle(ranked)
+        rng.shuffle(rest)
+        return ranked + rest
+    
+    def _allocate_day(self, ranked: List[Dict], pool_size: int, used: List[bool],
+                      budget: float, group_size: int = 1, points: np.ndarray = None) -> List[int]:
+        """Schedule one day from the ranked attractions not yet used on the trip.
+        
+        The day takes as many unused attractions of the interest pool (the
+        first ``pool_size`` of ``ranked``) as fit, and lower-ranked ones
+        refill it only when the pool cannot. Used attractions, again pool
+        first, top the day up only when the unused ones cannot fill it; that
+        starts a new round, so ``used`` is reset before the day is marked.
+        Chosen attractions are marked in ``used``, so each day costs one pass
+        over the candidates. Returns positions into ``ranked``.
+        """
+        positions = list(range(len(ranked)))
+        selected = self._schedule_ranked(
+            ranked, positions,
+            [(2 if position < pool_size else 1) + (0 if used[position] else 2) for position in positions],
+            budget, group_size, points
+        )
+        if any(used[position] for position in selected):
+            used[:] = [False] * len(used)
+        
+        for position in selected:
+            used[position] = True
+        if all(used):
+            used[:] = [False] * len(used)
+        return selected
+    
+    def _schedule_ranked(self, ranked: List[Dict], positions: List[int], tiers: List[int],
+                         budget: float, group_size: int, points: np.ndarray = None) -> List[int]:
+        """Schedule a day from ``ranked[positions]``, filling it by tier first.
+        
+        Values grow by a factor above MAX_DAY_ATTRACTIONS per tier, so no
+        number of lower-tier attractions outweighs one of a higher tier; a
+        bonus below one attraction's worth breaks ties. With ``points`` the
+        day clusters around its best-ranked candidate, which is worth a tier
+        more, and the bonus goes to the candidates closest to it; otherwise
+        it goes by rank.
+        """
+        if not positions:
+            return []
+        tiers = np.asarray(tiers, dtype=np.float64)
+        if points is None:
+            closeness = (len(ranked) - np.asarray(positions)) / len(ranked)
+        else:
+            anchor = int(np.argmax(tiers))
+            distances = distance_matrix(points[positions[anchor]][None, :], points[positions])[0]
+            closeness = 1 - distances / (distances.max() + 1e-9)
+            tiers[anchor] += 1
+        values = (MAX_DAY_ATTRACTIONS + 1) ** tiers + closeness / (2 * MAX_DAY_ATTRACTIONS)
+        chosen = self._schedule_day(
+            [ranked[position] for position in positions], values.tolist(), budget, group_size
+        )
+        return [positions[i] for i in chosen]
+    
+    def _attraction_points(self, attractions: List[Dict]) -> np.ndarray:
+        """(lat, lon) rows of ``attractions``, or None unless every one has coordinates"""
+        if not attractions or any("lat" not in attraction or "lon" not in attraction for attraction in attractions):
+            return None
+        return np.array([[attraction["lat"], attraction["lon"]] for attraction in attractions], dtype=np.float64)
+    
+    def _hotel_point(self, dest_data: Dict, points: np.ndarray) -> np.ndarray:
+        """Where each day starts and ends: the destination's location, else the attractions' centroid"""
+        if points is None:
+            return None
+        location = dest_data.get("location")
+        if location:
+            return np.array([location["lat"], location["lon"]], dtype=np.float64)
+        return points.mean(axis=0)
+    
+    def _order_route(self, start: np.ndarray, stops: np.ndarray, round_trip: bool = True) -> List[int]:
+        """Visiting order of ``stops`` on a round trip from ``start`` (or a path without ``round_trip``).
+        
+        A nearest-neighbour tour over the vectorized distance matrix,
+        improved by 2-opt until no reversal shortens it.
+        """
+        nodes = np.vstack([start[None, :], stops])
+        distances = distance_matrix(nodes, nodes)
+        
+        # Nearest neighbour from the start
+        route, unvisited = [0], np.ones(len(nodes), dtype=bool)
+        unvisited[0] = False
+        while unvisited.any():
+            nearest = int(np.argmin(np.where(unvisited, distances[route[-1]], np.inf)))
+            route.append(nearest)
+            unvisited[nearest] = False
+        if round_trip:
+            route.append(0)
+        
+        # 2-opt: reverse any segment whose endpoints are better swapped; an
+        # open path has no edge after its last stop
+        end = len(route) - 1 if round_trip else len(route)
+        improved = True
+        while improved:
+            improved = False
+            for i in range(1, end - 1):
+                for j in range(i + 1, end):
+                    delta = distances[route[i - 1], route[j]] - distances[route[i - 1], route[i]]
+                    if j + 1 < len(route):
+                        delta += distances[route[i], route[j + 1]] - distances[route[j], route[j + 1]]
+                    if delta < -1e-9:
+                        route[i:j + 1] = route[i:j + 1][::-1]
+                        improved = True
+        return [node - 1 for node in route[1:end]]
+    
+    def _schedule_day(self, attractions: List[Dict], values: List[float], budget: float,
+                      group_size: int = 1) -> List[int]:
+        """Pick the attractions of most total value that fit in one day.
+        
+        A 0/1 knapsack solved by dynamic programming over (attractions
+        chosen, hours used, budget steps used): each attraction takes its
+        duration plus travel time out of the day's window, at most
+        MAX_DAY_ATTRACTIONS are chosen and their group cost stays within
+        ``budget``. Each attraction is one vectorized update of the table, so
+        hundreds of candidates schedule in a few milliseconds. Returns
+        positions into ``attractions`` in their original order.
+        """
+        if not attractions:
+            return []
+        hours = DAY_END_HOUR - DAY_START_HOUR - LUNCH_HOURS
+        weights = np.array([math.ceil(attraction["duration"]) + TRAVEL_HOURS for attraction in attractions])
+        costs = np.array([attraction["cost"] for attraction in attractions], dtype=np.float64) * group_size
+        
+        # Costs in whole budget steps, unless no selection could exceed the
+        # budget; with none left only free attractions fit
+        if budget is None or np.sort(costs)[-MAX_DAY_ATTRACTIONS:].sum() <= budget:
+            steps, cost_steps = 0, np.zeros(len(attractions), dtype=np.int64)
+        else:
+            unit = max(1, math.ceil(budget / BUDGET_STEPS))
+            steps = max(int(budget // unit), 0)
+            cost_steps = np.ceil(costs / unit - 1e-9).astype(np.int64)
+        
+        # An attraction can only be part of a best day if fewer than
+        # MAX_DAY_ATTRACTIONS others taking as long cost no more and are worth
+        # more, so sweep each length by cost and drop the dominated ones
+        values = np.asarray(values, dtype=np.float64)
+        candidates, top_values = [], {}
+        for i in np.lexsort((-values, cost_steps, weights)).tolist():
+            if weights[i] > hours or cost_steps[i] > steps:
+                continue
+            top = top_values.setdefault(weights[i], [])
+            if len(top) < MAX_DAY_ATTRACTIONS:
+                heapq.heappush(top, values[i])
+            elif values[i] > top[0]:
+                heapq.heapreplace(top, values[i])
+            else:
+                continue
+            candidates.append(i)
+        candidates.sort()
+        
+        best = np.full((MAX_DAY_ATTRACTIONS + 1, hours + 1, steps + 1), -np.inf)
+        best[0, 0, 0] = 0.0
+        taken = np.zeros((len(candidates),) + best.shape, dtype=bool)
+        for c, i in enumerate(candidates):
+            weight, cost = int(weights[i]), int(cost_steps[i])
+            with_attraction = best[:-1, :hours + 1 - weight, :steps + 1 - cost] + values[i]
+            improved = with_attraction > best[1:, weight:, cost:]
+            best[1:, weight:, cost:][improved] = with_attraction[improved]
+            taken[c, 1:, weight:, cost:] = improved
+        
+        # Walk back from the best final state
+        count, used_hours, used_steps = np.unravel_index(np.argmax(best), best.shape)
+        selected = []
+        for c in range(len(candidates) - 1, -1, -1):
+            if count == 0:
+                break
+            if taken[c, count, used_hours, used_steps]:
+                i = candidates[c]
+                selected.append(i)
+                count, used_hours, used_steps = count - 1, used_hours - weights[i], used_steps - cost_steps[i]
+        return selected[::-1]
+    
+    def _daily_activity_budget(self, budget: float, duration: int, destination: str,
+                               travel_style: str, group_size: int) -> float:
+        """Per-day attraction budget: the trip budget per day less lodging and lunch"""
+        if budget is None or duration <= 0:
+            return None
+        accommodation = self._generate_accommodation(destination, travel_style, budget)
+        return budget / duration - accommodation["cost"] - self._lunch_cost(travel_style) * group_size
+    
+    def _lunch_cost(self, travel_style: str) -> float:
+        """Per-person cost of the daily lunch break"""
+        return 15 if travel_style == "budget" else 50
+    
+    def _build_attraction_index(self, attractions: List[Dict]) -> Dict[str, List[int]]:
+        """Map each lower-cased attraction type to its attractions' positions"""
+        index = {}
+        for position, attraction in enumerate(attractions):
+            index.setdefault(attraction["type"].lower(), []).append(position)
+        return index
+    
     def _filter_attractions(self, attractions: List[Dict], interests: List[str], 
-                          travel_style: str) -> List[Dict]:
-        """Filter attractions based on interests and travel style"""
+                          travel_style: str, index: Dict[str, List[int]] = None) -> List[Dict]:
+        """Filter attractions based on interests and travel style.
+        
+        Interests are matched against the distinct attraction types in
+        ``index`` rather than against every attraction, keeping catalog order.
+        """
         if not interests:
             return attractions
+        if index is None:
+            index = self._build_attraction_index(attractions)
         
-        filtered = []
-        for attraction in attractions:
-            # Check if attraction type matches interests
-            if any(interest.lower() in attraction["type"].lower() for interest in interests):
-                filtered.append(attraction)
+        # Keep attractions whose type contains any interest
+        interests = [interest.lower() for interest in interests]
+        positions = [
+            position
+            for attraction_type, type_positions in index.items()
+            if any(interest in attraction_type for interest in interests)
+            for position in type_positions
+        ]
         
-        return filtered if filtered else attractions
+        return [attractions[position] for position in sorted(positions)] if positions else attractions
     
     def _generate_accommodation(self, destination: str, travel_style: str, budget: float) -> Dict:
         """Generate accommodation recommendation"""
@@ -242,15 +806,7 @@ class ItineraryGenerator:
     
     def _generate_transportation(self, destination: str, travel_style: str) -> List[Dict]:
         """Generate transportation recommendations"""
-        transport_options = {
-            "budget": ["public transport", "walking"],
-            "luxury": ["private car", "taxi"],
-            "adventure": ["bicycle", "hiking"],
-            "cultural": ["public transport", "walking"],
-            "relaxation": ["private car", "walking"]
-        }
-        
-        options = transport_options.get(travel_style, ["public transport", "walking"])
+        options = self.transport_options.get(travel_style, ["public transport", "walking"])
         
         return [
             {
@@ -265,6 +821,62 @@ class ItineraryGenerator:
             for option in options[:2]  # Limit to 2 options
         ]
     
+    def _generate_route_transportation(self, destination: str, travel_style: str, hotel: np.ndarray,
+                                       activities: List[Dict], group_size: int = 1) -> List[Dict]:
+        """Transport legs from the hotel through the day's attractions and back.
+        
+        Each leg's mode, duration and cost follow from its distance. The
+        first leg arrives for the first activity; the others leave as the
+        previous activity ends. Without coordinates the generic
+        recommendations are returned instead.
+        """
+        visits = [activity for activity in activities if "coordinates" in activity]
+        if hotel is None or not visits:
+            return self._generate_transportation(destination, travel_style)
+        
+        names = ["Hotel"] + [visit["activity"] for visit in visits] + ["Hotel"]
+        points = np.vstack([
+            hotel[None, :],
+            [[visit["coordinates"]["lat"], visit["coordinates"]["lon"]] for visit in visits],
+            hotel[None, :]
+        ])
+        distances = np.diagonal(distance_matrix(points[:-1], points[1:]))
+        options = self.transport_options.get(travel_style, ["public transport", "walking"])
+        
+        legs = []
+        for leg, distance in enumerate(distances.tolist()):
+            mode = options[0]
+            if distance <= WALKING_DISTANCE_KM:
+                mode = next((option for option in options if option in ("walking", "hiking")), mode)
+            transport = TRANSPORT_MODES.get(mode, TRANSPORT_MODES["public transport"])
+            travel_hours = distance / transport["speed"]
+            if leg == 0:
+                departure = self._activity_hour(visits[0]) - travel_hours
+            else:
+                departure = self._activity_hour(visits[leg - 1]) + visits[leg - 1]["duration"]
+            cost = transport["fare"] + transport["perKm"] * distance
+            legs.append({
+                "type": mode,
+                "from": names[leg],
+                "to": names[leg + 1],
+                "distanceKm": round(distance, 2),
+                "departureTime": self._format_time(departure),
+                "arrivalTime": self._format_time(departure + travel_hours),
+                "cost": round(cost * group_size if transport["perPerson"] else cost, 2),
+                "bookingStatus": "pending"
+            })
+        return legs
+    
+    def _activity_hour(self, activity: Dict) -> float:
+        """Start of an activity in hours after midnight"""
+        hours, minutes = activity["time"].split(":")
+        return int(hours) + int(minutes) / 60
+    
+    def _format_time(self, hours: float) -> str:
+        """Format hours after midnight as HH:MM"""
+        minutes = int(round(hours * 60))
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+    
     def _get_generic_destination_data(self, destination: str) -> Dict:
         """Generate generic data for unknown destinations"""
         return {
@@ -1,14 +1,56 @@
+import base64
+import binascii
 import json
 import random
-from typing import Dict, List, Any
+import threading
+import time
+import numpy as np
+from itertools import islice
+from typing import Dict, List, Any, Iterable, Iterator
 import logging
+from .destination_catalog import DestinationCatalog, COST_LEVELS
+from .collaborative_filter import ItemSimilarityModel
+from .cost_predictor import CostPredictor, MISCELLANEOUS_RATE
+from .columnar import current_version
+from .result_cache import ResultCache, canonical_key
 
 logger = logging.getLogger(__name__)
 
+# Lookup tables mirroring _calculate_cost_match (by level distance) and
+# _calculate_style_match (indexed by exact_match * 2 + has_flexible_style)
+COST_MATCH_BY_DISTANCE = np.array([1.0, 0.7, 0.3])
+STYLE_MATCH = np.array([0.3, 0.7, 1.0, 1.0])
+
 class RecommendationEngine:
-    def __init__(self):
-        self.destination_database = self._load_destination_database()
+    def __init__(self, catalog_path: str = None, reload_interval: float = 5.0,
+                 cache_size: int = 1024, cache_ttl: float = 300.0,
+                 similarity_model_path: str = None, cost_predictor: CostPredictor = None,
+                 ranking_pages: int = 4):
         self.user_preference_weights = self._load_preference_weights()
+        self.result_cache = ResultCache(cache_size, cache_ttl)
+        # Ranked destination rows per query, for serving later pages by cursor
+        self.ranking_cache = ResultCache(cache_size, cache_ttl)
+        self.ranking_pages = ranking_pages
+        self.cost_predictor = cost_predictor or CostPredictor()
+        self.catalog_path = catalog_path
+        self.similarity_model_path = similarity_model_path
+        self.reload_interval = reload_interval
+        self._reload_lock = threading.Lock()
+        self._last_reload_check = time.monotonic()
+        self._item_rows = None
+        self._tier_totals = None
+        
+        if catalog_path:
+            # Memory-mapped catalog shared by all workers, hot-reloaded on publish
+            self.destination_database = None
+            self._set_catalog(DestinationCatalog.open(catalog_path))
+        else:
+            self.load_catalog(self._load_destination_database()["destinations"])
+        
+        # Optional item-item model built offline from booking history
+        self.item_similarity = None
+        if similarity_model_path:
+            self.load_item_similarity(ItemSimilarityModel.open(similarity_model_path))
         
     def _load_destination_database(self) -> Dict[str, Any]:
         """Load comprehensive destination database"""
@@ -79,34 +121,300 @@ class RecommendationEngine:
             "activities": 0.30,
             "travel_style": 0.20,
             "climate": 0.15,
-            "popularity": 0.10
+            "popularity": 0.10,
+            "collaborative": 0.15
         }
     
+    def load_catalog(self, destinations: Dict[str, Any]):
+        """Replace the destination database and rebuild its columnar encoding"""
+        self.destination_database = {"destinations": destinations}
+        self._set_catalog(DestinationCatalog.from_destinations(destinations))
+    
+    def _set_catalog(self, catalog: DestinationCatalog):
+        """Swap the active catalog; cached results are keyed on it and dropped"""
+        self.catalog = catalog
+        self.result_cache.clear()
+        self.ranking_cache.clear()
+    
+    def load_item_similarity(self, model: ItemSimilarityModel):
+        """Replace the collaborative filtering model; cached results are dropped"""
+        self.item_similarity = model
+        self.result_cache.clear()
+        self.ranking_cache.clear()
+    
+    def reload_catalog(self) -> bool:
+        """Swap in newly published catalog and item similarity versions, if any.
+        
+        Requests already running keep the catalog snapshot they started
+        with; the old memory map is released once they finish.
+        """
+        reloaded = False
+        with self._reload_lock:
+            version = current_version(self.catalog_path) if self.catalog_path else None
+            if version is not None and version != self.catalog.version:
+                self._set_catalog(DestinationCatalog.open(self.catalog_path, version))
+                logger.info(f"Reloaded destination catalog {version} ({len(self.catalog)} destinations)")
+                reloaded = True
+            
+            version = current_version(self.similarity_model_path) if self.similarity_model_path else None
+            if version is not None and version != self.item_similarity.version:
+                self.load_item_similarity(ItemSimilarityModel.open(self.similarity_model_path, version))
+                logger.info(f"Reloaded item similarity model {version}")
+                reloaded = True
+        return reloaded
+    
+    def _maybe_reload_catalog(self):
+        """Check for newly published data at most every ``reload_interval`` seconds"""
+        if not self.catalog_path and not self.similarity_model_path:
+            return
+        now = time.monotonic()
+        if now - self._last_reload_check < self.reload_interval:
+            return
+        self._last_reload_check = now
+        try:
+            self.reload_catalog()
+        except Exception as e:
+            logger.error(f"Error reloading destination catalog: {str(e)}")
+    
     def get_recommendations(self, user_preferences: Dict[str, Any], 
                           budget_range: Dict[str, float] = None,
                           travel_history: List[str] = None,
-                          interests: List[str] = None) -> Dict[str, Any]:
-        """Get personalized travel recommendations"""
+                          interests: List[str] = None,
+                          top_k: int = 5,
+                          duration: int = None,
+                          group_size: int = 1,
+                          cursor: str = None) -> Dict[str, Any]:
+        """Get personalized travel recommendations.
+        
+        With a ``duration`` and a ``budget_range``, destinations are scored by
+        their estimated trip cost for ``group_size`` travelers instead of the
+        coarse cost level, and those over the budget maximum are left out.
         
-        # Calculate destination scores
-        destination_scores = self._calculate_destination_scores(
-            user_preferences, budget_range, travel_history, interests
+        Results are paginated: ``top_k`` is the page size and the response's
+        ``nextCursor``, passed back as ``cursor`` with the same query, returns
+        the following page.
+        """
+        
+        # Pin one catalog snapshot for the whole request so a hot reload
+        # never mixes rows from two catalog versions
+        self._maybe_reload_catalog()
+        catalog = self.catalog
+        
+        if cursor is not None:
+            return self._get_recommendation_page(
+                catalog, cursor, user_preferences, budget_range, travel_history, interests, top_k,
+                duration, group_size
+            )
+        
+        cache_key = self._result_cache_key(
+            catalog, user_preferences, budget_range, travel_history, interests, top_k, duration, group_size
+        )
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Score the whole catalog in one vectorized pass
+        activity_match = self._match_activities(interests, catalog)
+        scores = self._score_catalog(
+            user_preferences, budget_range, travel_history, interests, activity_match, catalog,
+            duration, group_size
+        )
+        
+        recommendations = self._build_recommendations(
+            catalog, scores, activity_match, user_preferences, budget_range, travel_history, interests, top_k,
+            duration, group_size
         )
+        self.result_cache.set(cache_key, recommendations)
+        return recommendations
+    
+    def get_batch_recommendations(self, profiles: Iterable[Dict[str, Any]],
+                                  max_matrix_bytes: int = 32 * 1024 * 1024) -> Iterator[Dict[str, Any]]:
+        """Yield recommendations for many preference profiles, in input order.
+        
+        Each profile holds the ``get_recommendations`` keyword arguments.
+        Profiles are consumed lazily and those missing from the result cache
+        are scored together into a users x destinations matrix, in chunks
+        sized so the matrix stays under ``max_matrix_bytes``; memory is
+        therefore bounded however many profiles are streamed through.
+        """
+        self._maybe_reload_catalog()
+        catalog = self.catalog
+        chunk_size = max(1, max_matrix_bytes // (8 * max(len(catalog), 1)))
+        
+        profiles = iter(profiles)
+        while True:
+            chunk = [self._normalize_profile(profile) for profile in islice(profiles, chunk_size)]
+            if not chunk:
+                return
+            
+            keys = [
+                self._result_cache_key(
+                    catalog, profile["user_preferences"], profile["budget_range"],
+                    profile["travel_history"], profile["interests"], profile["top_k"],
+                    profile["duration"], profile["group_size"]
+                )
+                for profile in chunk
+            ]
+            results = [self.result_cache.get(key) for key in keys]
+            misses = [i for i, result in enumerate(results) if result is None]
+            
+            if misses:
+                missed = [chunk[i] for i in misses]
+                activity_matches = [self._match_activities(profile["interests"], catalog) for profile in missed]
+                scores = self._score_profiles(missed, activity_matches, catalog)
+                for i, profile, row_scores, activity_match in zip(misses, missed, scores, activity_matches):
+                    results[i] = self._build_recommendations(
+                        catalog, row_scores, activity_match, profile["user_preferences"],
+                        profile["budget_range"], profile["travel_history"], profile["interests"], profile["top_k"],
+                        profile["duration"], profile["group_size"]
+                    )
+                    self.result_cache.set(keys[i], results[i])
+            
+            yield from results
+    
+    def get_similar_destinations(self, destination: str, top_k: int = 5,
+                                 exclude: List[str] = None) -> Dict[str, Any]:
+        """Find the destinations most like ``destination`` by embedding cosine similarity.
+        
+        Embeddings are unit-norm, so one matrix-vector product scores the
+        whole catalog; published catalogs ship them precomputed.
+        """
+        self._maybe_reload_catalog()
+        catalog = self.catalog
+        row = catalog.index.get(destination)
+        if row is None:
+            raise KeyError(destination)
+        
+        embeddings = catalog.embeddings()
+        similarities = (embeddings @ embeddings[row]).astype(np.float64)
+        similarities[row] = -np.inf
+        if exclude:
+            excluded = [catalog.index.get(name) for name in exclude]
+            similarities[[i for i in excluded if i is not None]] = -np.inf
+        
+        similar = []
+        for i in self._select_top_k(similarities, top_k):
+            dest_data = catalog.record(i)
+            similar.append({
+                "destination": catalog.names[i],
+                "similarity": round(float(similarities[i]), 3),
+                "category": dest_data["category"],
+                "region": dest_data["region"],
+                "climate": dest_data["climate"],
+                "cost_level": dest_data["cost_level"],
+                "activities": dest_data["activities"],
+                "travel_styles": dest_data["travel_styles"],
+                "rating": dest_data["rating"]
+            })
+        
+        return {
+            "destination": destination,
+            "similarDestinations": similar
+        }
+    
+    def _result_cache_key(self, catalog: DestinationCatalog, user_preferences: Dict[str, Any],
+                          budget_range: Dict[str, float], travel_history: List[str],
+                          interests: List[str], top_k: int, duration: int = None,
+                          group_size: int = 1) -> str:
+        """Canonical cache key of a request, tied to the catalog and current weights"""
+        model = self.item_similarity
+        return canonical_key(
+            catalog.token, model.token if model is not None else None, self.user_preference_weights,
+            user_preferences, budget_range, travel_history, interests, top_k, duration, group_size
+        )
+    
+    def _normalize_profile(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill in the ``get_recommendations`` defaults for a batch profile"""
+        return {
+            "user_preferences": profile.get("user_preferences") or {},
+            "budget_range": profile.get("budget_range"),
+            "travel_history": profile.get("travel_history"),
+            "interests": profile.get("interests"),
+            "top_k": profile.get("top_k", 5),
+            "duration": profile.get("duration"),
+            "group_size": profile.get("group_size", 1)
+        }
+    
+    def _get_recommendation_page(self, catalog: DestinationCatalog, cursor: str,
+                                 user_preferences: Dict[str, Any], budget_range: Dict[str, float],
+                                 travel_history: List[str], interests: List[str], page_size: int,
+                                 duration: int = None, group_size: int = 1) -> Dict[str, Any]:
+        """Serve a later page from the query's cached ranking.
+        
+        The catalog is only rescored when the ranking has expired from the
+        cache, was built against another catalog or similarity model, or
+        does not reach the requested page. An extended ranking at least
+        doubles in depth, so paging deep into a query rescores it rarely.
+        """
+        query_key = self._ranking_key(user_preferences, budget_range, travel_history, interests, duration, group_size)
+        offset = self._decode_cursor(cursor, query_key)
         
-        # Sort destinations by score
-        sorted_destinations = sorted(
-            destination_scores.items(), 
-            key=lambda x: x[1], 
-            reverse=True
+        ranking = self.ranking_cache.get(query_key)
+        depth = offset + max(page_size, 1) * self.ranking_pages
+        if ranking is not None and ranking["token"] == self._ranking_token(catalog):
+            ranked = len(ranking["rows"])
+            depth = None if offset + page_size <= ranked or ranking["complete"] else max(depth, 2 * ranked)
+        if depth is not None:
+            activity_match = self._match_activities(interests, catalog)
+            scores = self._score_catalog(
+                user_preferences, budget_range, travel_history, interests, activity_match, catalog,
+                duration, group_size
+            )
+            ranking = self._rank(catalog, scores, activity_match, depth)
+            self.ranking_cache.set(query_key, ranking)
+        
+        return self._build_page(
+            catalog, ranking, query_key, offset, page_size, user_preferences, budget_range,
+            travel_history, interests, duration, group_size
+        )
+    
+    def _build_recommendations(self, catalog: DestinationCatalog, scores: np.ndarray, activity_match,
+                               user_preferences: Dict[str, Any], budget_range: Dict[str, float],
+                               travel_history: List[str], interests: List[str],
+                               top_k: int, duration: int = None, group_size: int = 1) -> Dict[str, Any]:
+        """Assemble the first page for one profile from its catalog scores and cache its ranking"""
+        ranking = self._rank(catalog, scores, activity_match, max(top_k, 1) * self.ranking_pages)
+        query_key = self._ranking_key(user_preferences, budget_range, travel_history, interests, duration, group_size)
+        self.ranking_cache.set(query_key, ranking)
+        return self._build_page(
+            catalog, ranking, query_key, 0, top_k, user_preferences, budget_range,
+            travel_history, interests, duration, group_size
         )
+    
+    def _rank(self, catalog: DestinationCatalog, scores: np.ndarray, activity_match,
+              depth: int) -> Dict[str, Any]:
+        """Ranked rows and scores of the best ``depth`` destinations.
+        
+        ``complete`` says whether every rankable destination is included;
+        otherwise pages past ``depth`` extend the ranking rather than end.
+        """
+        rows = self._select_top_k(scores, depth)
+        return {
+            "token": self._ranking_token(catalog),
+            "rows": rows.astype(np.int32),
+            "complete": len(rows) < depth,
+            "scores": scores[rows],
+            "matchedActivities": activity_match[2]
+        }
+    
+    def _build_page(self, catalog: DestinationCatalog, ranking: Dict[str, Any], query_key: str,
+                    offset: int, page_size: int, user_preferences: Dict[str, Any],
+                    budget_range: Dict[str, float], travel_history: List[str], interests: List[str],
+                    duration: int = None, group_size: int = 1) -> Dict[str, Any]:
+        """Assemble the response for one page of a ranking"""
         
         # Get top recommendations
         top_recommendations = []
-        for destination, score in sorted_destinations[:5]:
-            dest_data = self.destination_database["destinations"][destination]
+        page_rows = ranking["rows"][offset:offset + max(page_size, 0)]
+        trip_costs = None
+        if self._budget_feasible_mode(budget_range, duration):
+            trip_costs = self._trip_costs(catalog, user_preferences, duration, group_size, page_rows)
+        for rank, i in enumerate(page_rows):
+            destination = catalog.names[i]
+            dest_data = catalog.record(i)
             recommendation = {
                 "destination": destination,
-                "score": round(score, 3),
+                "score": round(float(ranking["scores"][offset + rank]), 3),
                 "category": dest_data["category"],
                 "region": dest_data["region"],
                 "cost_level": dest_data["cost_level"],
@@ -116,9 +424,11 @@ class RecommendationEngine:
                 "rating": dest_data["rating"],
                 "popularity": dest_data["popularity"],
                 "reasoning": self._generate_recommendation_reasoning(
-                    destination, user_preferences, interests
+                    destination, user_preferences, interests, ranking["matchedActivities"], catalog
                 )
             }
+            if trip_costs is not None:
+                recommendation["estimatedCost"] = round(float(trip_costs[rank]), 2)
             top_recommendations.append(recommendation)
         
         # Generate alternative recommendations
@@ -126,69 +436,274 @@ class RecommendationEngine:
             user_preferences, budget_range, interests
         )
         
+        next_offset = offset + len(page_rows)
         return {
             "topRecommendations": top_recommendations,
             "alternativeRecommendations": alternative_recommendations,
             "userPreferences": user_preferences,
             "budgetRange": budget_range,
             "interests": interests,
-            "travelHistory": travel_history
+            "travelHistory": travel_history,
+            "nextCursor": (
+                self._encode_cursor(query_key, next_offset)
+                if len(page_rows) and (next_offset < len(ranking["rows"]) or not ranking["complete"]) else None
+            )
         }
     
+    def _ranking_key(self, user_preferences: Dict[str, Any], budget_range: Dict[str, float],
+                     travel_history: List[str], interests: List[str], duration: int = None,
+                     group_size: int = 1) -> str:
+        """Key of a query's ranking, independent of page size and data versions.
+        
+        Leaving the catalog and model out keeps cursors valid across a hot
+        reload; the ranking is rebuilt against the new data instead.
+        """
+        return canonical_key(
+            self.user_preference_weights, user_preferences, budget_range, travel_history, interests,
+            duration, group_size
+        )
+    
+    def _ranking_token(self, catalog: DestinationCatalog) -> List[str]:
+        """Data versions a ranking was computed against"""
+        model = self.item_similarity
+        return [catalog.token, model.token if model is not None else None]
+    
+    def _encode_cursor(self, query_key: str, offset: int) -> str:
+        """Opaque cursor naming a query and a position in its ranking"""
+        payload = json.dumps({"q": query_key, "o": offset}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+    
+    def _decode_cursor(self, cursor: str, query_key: str) -> int:
+        """Return the offset of a cursor, which must belong to the same query"""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            offset = int(payload["o"])
+        except (ValueError, TypeError, KeyError, AttributeError, binascii.Error):
+            raise ValueError("Invalid cursor")
+        if payload.get("q") != query_key or offset < 0:
+            raise ValueError("Cursor does not belong to this query")
+        return offset
+    
     def _calculate_destination_scores(self, user_preferences: Dict[str, Any],
                                     budget_range: Dict[str, float],
                                     travel_history: List[str],
                                     interests: List[str]) -> Dict[str, float]:
         """Calculate scores for each destination based on user preferences"""
-        scores = {}
+        catalog = self.catalog
+        scores = self._score_catalog(user_preferences, budget_range, travel_history, interests, catalog=catalog)
+        return {
+            name: float(score)
+            for name, score in zip(catalog.names, scores)
+            if np.isfinite(score)
+        }
+    
+    def _select_top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """Return indices of the ``k`` best finite scores, best first.
         
-        for destination, dest_data in self.destination_database["destinations"].items():
-            score = 0.0
-            
-            # Skip if already visited
-            if travel_history and destination in travel_history:
-                continue
+        Uses an O(n) partition to find the cut-off score, then sorts only the
+        candidates at or above it. Ties are broken by catalog order, matching
+        a stable full sort.
+        """
+        k = min(max(k, 0), len(scores))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64)
+        
+        cutoff = np.partition(scores, len(scores) - k)[len(scores) - k]
+        if np.isfinite(cutoff):
+            candidates = np.flatnonzero(scores >= cutoff)
+        else:
+            # Fewer than k destinations left after removing visited ones
+            candidates = np.flatnonzero(np.isfinite(scores))
+        
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order[:k]]
+    
+    def _score_catalog(self, user_preferences: Dict[str, Any],
+                       budget_range: Dict[str, float],
+                       travel_history: List[str],
+                       interests: List[str],
+                       activity_match=None,
+                       catalog: DestinationCatalog = None,
+                       duration: int = None,
+                       group_size: int = 1) -> np.ndarray:
+        """Score every catalog destination at once for a single profile"""
+        catalog = self.catalog if catalog is None else catalog
+        profile = {
+            "user_preferences": user_preferences,
+            "budget_range": budget_range,
+            "travel_history": travel_history,
+            "interests": interests,
+            "duration": duration,
+            "group_size": group_size
+        }
+        activity_match = activity_match or self._match_activities(interests, catalog)
+        return self._score_profiles([profile], [activity_match], catalog)[0]
+    
+    def _score_profiles(self, profiles: List[Dict[str, Any]], activity_matches: List,
+                        catalog: DestinationCatalog) -> np.ndarray:
+        """Score a users x destinations matrix.
+        
+        Vectorized equivalent of applying the ``_calculate_*_match`` helpers
+        per destination. Each weighted component vector is computed once per
+        distinct preference value in the batch and added row by row;
+        components are accumulated in the same order as the helpers so the
+        scores are bit-identical. Already visited destinations, and in
+        budget-feasible mode destinations whose estimated trip cost exceeds
+        the budget maximum, score -inf.
+        """
+        weights = self.user_preference_weights
+        scores = np.zeros((len(profiles), len(catalog)))
+        components = {}
+        
+        def component(key, build):
+            if key not in components:
+                components[key] = build()
+            return components[key]
+        
+        popularity = catalog.columns["popularity"] * weights["popularity"]
+        model = self.item_similarity
+        item_rows = self._catalog_item_rows(catalog, model) if model is not None else None
+        
+        for u, (profile, (match_rows, matches, _)) in enumerate(zip(profiles, activity_matches)):
+            user_preferences = profile["user_preferences"]
+            row = scores[u]
             
-            # Cost level matching
-            if budget_range and "cost_level" in user_preferences:
-                cost_match = self._calculate_cost_match(
-                    dest_data["cost_level"], 
-                    user_preferences["cost_level"],
-                    budget_range
+            # Budget fit of the estimated trip cost, or cost level matching
+            if self._budget_feasible_mode(profile["budget_range"], profile.get("duration")):
+                row += self._budget_component(
+                    self._trip_costs(catalog, user_preferences, profile["duration"], profile.get("group_size", 1)),
+                    profile["budget_range"]
                 )
-                score += cost_match * self.user_preference_weights["cost_level"]
+            elif profile["budget_range"] and "cost_level" in user_preferences:
+                user_cost = COST_LEVELS.get(user_preferences["cost_level"], 2)
+                row += component(("cost_level", user_cost), lambda: self._cost_component(catalog, user_cost))
             
-            # Activities matching
-            if interests:
-                activity_match = self._calculate_activity_match(
-                    dest_data["activities"], interests
-                )
-                score += activity_match * self.user_preference_weights["activities"]
+            # Activities matching, only destinations with at least one match are touched
+            if profile["interests"]:
+                row[match_rows] += (matches / len(profile["interests"])) * weights["activities"]
             
             # Travel style matching
             if "travel_style" in user_preferences:
-                style_match = self._calculate_style_match(
-                    dest_data["travel_styles"], 
-                    user_preferences["travel_style"]
+                user_style = user_preferences["travel_style"]
+                flexible = component(("flexible_style",), lambda: catalog.has_any(
+                    "travel_styles", catalog.terms_mask("travel_styles", ["balanced", "mixed"])
+                ))
+                row += component(
+                    ("travel_style", user_style), lambda: self._style_component(catalog, user_style, flexible)
                 )
-                score += style_match * self.user_preference_weights["travel_style"]
             
             # Climate matching
             if "climate_preference" in user_preferences:
-                climate_match = self._calculate_climate_match(
-                    dest_data["climate"], 
-                    user_preferences["climate_preference"]
+                user_climate = user_preferences["climate_preference"]
+                row += component(
+                    ("climate", user_climate), lambda: self._climate_component(catalog, user_climate)
                 )
-                score += climate_match * self.user_preference_weights["climate"]
             
             # Popularity and rating
-            popularity_score = dest_data["popularity"] * self.user_preference_weights["popularity"]
-            score += popularity_score
+            row += popularity
+            
+            # Collaborative filtering: destinations co-visited with the user's history
+            if model is not None and profile["travel_history"]:
+                rows, similarity = self._collaborative_scores(model, item_rows, profile["travel_history"])
+                row[rows] += similarity * weights["collaborative"]
             
-            scores[destination] = score
+            # Skip if already visited
+            if profile["travel_history"]:
+                visited = [catalog.index.get(name) for name in profile["travel_history"]]
+                row[[i for i in visited if i is not None]] = -np.inf
         
         return scores
     
+    def _catalog_item_rows(self, catalog: DestinationCatalog, model: ItemSimilarityModel) -> np.ndarray:
+        """Catalog row of every similarity model item (-1 if not in the catalog), cached per pair"""
+        cached = self._item_rows
+        if cached is None or cached[0] != (catalog.token, model.token):
+            cached = ((catalog.token, model.token), catalog.index.lookup_hashes(model.item_hashes()))
+            self._item_rows = cached
+        return cached[1]
+    
+    def _collaborative_scores(self, model: ItemSimilarityModel, item_rows: np.ndarray,
+                              travel_history: List[str]):
+        """Mean item-item similarity of catalog destinations to the user's history"""
+        history = [model.index.get(name) for name in travel_history]
+        items, similarity = model.neighbour_scores([item for item in history if item is not None])
+        rows = item_rows[items]
+        in_catalog = rows >= 0
+        return rows[in_catalog], similarity[in_catalog]
+    
+    def _budget_feasible_mode(self, budget_range: Dict[str, float], duration: int) -> bool:
+        """Whether a request asks for trip-cost based budget scoring"""
+        return bool(budget_range) and bool(duration)
+    
+    def _catalog_tier_totals(self, catalog: DestinationCatalog) -> np.ndarray:
+        """Destinations x cost tiers per-person daily totals, cached per catalog"""
+        cached = self._tier_totals
+        if cached is None or cached[0] != catalog.token:
+            cached = (catalog.token, self.cost_predictor.daily_tier_totals(catalog.index, len(catalog)))
+            self._tier_totals = cached
+        return cached[1]
+    
+    def _trip_costs(self, catalog: DestinationCatalog, user_preferences: Dict[str, Any],
+                    duration: int, group_size: int, rows=slice(None)) -> np.ndarray:
+        """Estimated total trip cost of catalog destinations, as ``CostPredictor.predict`` computes it"""
+        tier = self.cost_predictor.cost_tier_index(user_preferences.get("travel_style", "balanced"))
+        trip = self._catalog_tier_totals(catalog)[rows, tier] * (group_size * duration)
+        return trip + trip * MISCELLANEOUS_RATE
+    
+    def _budget_component(self, trip_costs: np.ndarray, budget_range: Dict[str, float]) -> np.ndarray:
+        """Weighted budget fit: 1.0 within the range, 0.7 under its minimum, -inf over its maximum"""
+        fit = np.where(trip_costs < (budget_range.get("min") or 0), 0.7, 1.0)
+        fit *= self.user_preference_weights["cost_level"]
+        if budget_range.get("max") is not None:
+            fit[trip_costs > budget_range["max"]] = -np.inf
+        return fit
+    
+    def _cost_component(self, catalog: DestinationCatalog, user_cost: int) -> np.ndarray:
+        """Weighted cost match of every destination for one user cost rank"""
+        distance = np.abs(catalog.cost_ranks - user_cost)
+        return COST_MATCH_BY_DISTANCE[np.minimum(distance, 2)] * self.user_preference_weights["cost_level"]
+    
+    def _style_component(self, catalog: DestinationCatalog, user_style: str,
+                         flexible: np.ndarray) -> np.ndarray:
+        """Weighted travel style match of every destination for one travel style"""
+        exact = catalog.has_any("travel_styles", catalog.terms_mask("travel_styles", [user_style]))
+        return STYLE_MATCH[exact * 2 + flexible] * self.user_preference_weights["travel_style"]
+    
+    def _climate_component(self, catalog: DestinationCatalog, user_climate: str) -> np.ndarray:
+        """Weighted climate match of every destination for one climate preference"""
+        same = catalog.columns["climate"] == catalog.category_code("climate", user_climate)
+        climate_match = np.where(same, 1.0, 0.8 if user_climate == "any" else 0.4)
+        return climate_match * self.user_preference_weights["climate"]
+    
+    def _match_activities(self, interests: List[str], catalog: DestinationCatalog = None):
+        """Resolve interests against the inverted activity index.
+        
+        Returns ``(rows, matches, matched_activities)``: the catalog rows that
+        match at least one interest (or ``slice(None)`` when matches are dense
+        and ``matches`` covers every row), how many interests each of them
+        matches, and the set of activity terms hit by any interest.
+        """
+        catalog = self.catalog if catalog is None else catalog
+        if not interests:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), set()
+        
+        vocab = catalog.vocabularies["activities"]
+        per_interest = []
+        matched_activities = set()
+        for interest in interests:
+            codes = catalog.expand_substring("activities", interest)
+            matched_activities.update(vocab[code] for code in codes)
+            per_interest.append(catalog.postings("activities", codes))
+        
+        hits = np.concatenate(per_interest)
+        if len(hits) * 8 < len(catalog):
+            rows, matches = np.unique(hits, return_counts=True)
+        else:
+            # Dense matches: count over the whole catalog instead of sorting postings
+            matches = np.bincount(hits, minlength=len(catalog))
+            rows = slice(None)
+        return rows, matches, matched_activities
+    
     def _calculate_cost_match(self, dest_cost_level: str, user_cost_level: str,
                             budget_range: Dict[str, float]) -> float:
         """Calculate cost level matching score"""
@@ -241,9 +756,12 @@ class RecommendationEngine:
     
     def _generate_recommendation_reasoning(self, destination: str,
                                          user_preferences: Dict[str, Any],
-                                         interests: List[str]) -> str:
+                                         interests: List[str],
+                                         matched_activities: set = None,
+                                         catalog: DestinationCatalog = None) -> str:
         """Generate reasoning for why a destination was recommended"""
-        dest_data = self.destination_database["destinations"][destination]
+        catalog = self.catalog if catalog is None else catalog
+        dest_data = catalog.get(destination)
         reasons = []
         
         # Cost reasoning
@@ -253,9 +771,11 @@ class RecommendationEngine:
         
         # Activity reasoning
         if interests:
+            if matched_activities is None:
+                matched_activities = self._match_activities(interests, catalog)[2]
             matching_activities = [
                 activity for activity in dest_data["activities"]
-                if any(interest.lower() in activity.lower() for interest in interests)
+                if activity in matched_activities
             ]
             if matching_activities:
                 reasons.append(f"Perfect for {', '.join(matching_activities)} activities")
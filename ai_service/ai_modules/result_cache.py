@@ -0,0 +1,91 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class ResultCache:
+    """Thread-safe in-process cache with LRU eviction and a time-to-live.
+
+    Values are copied on the way in and out so callers can never mutate a
+    cached result; ``copy_value`` can replace the default deep copy with a
+    cheaper one that knows the value's shape. A ``ttl`` of None never
+    expires entries. Hit, miss, eviction and expiration counts are kept for
+    sizing the cache against real traffic.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0,
+                 copy_value: Callable[[Any], Any] = copy.deepcopy):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.copy_value = copy_value
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str, default=None):
+        """Return a copy of the cached value for ``key`` or ``default``"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return self.copy_value(value)
+
+    def set(self, key: str, value: Any):
+        """Store a copy of ``value``, evicting the least recently used entries"""
+        if self.max_size <= 0:
+            return
+        value = self.copy_value(value)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and the current hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def canonical_key(*parts: Any) -> str:
+    """Hash JSON-serializable inputs into a stable key, independent of dict key order"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -4,6 +4,10 @@ import os
 from dotenv import load_dotenv
 import logging
 
+# Load environment variables from .env file in the ai_service directory
+# before the blueprints create their AI modules
+load_dotenv()
+
 # Import Blueprints
 from routes.main_routes import main_bp
 from routes.itinerary_routes import itinerary_bp
@@ -11,9 +15,6 @@ from routes.cost_routes import cost_bp
 from routes.recommendation_routes import recommendation_bp
 from routes.utility_routes import utility_bp
 
-# Load environment variables from .env file in the ai_service directory
-load_dotenv()
-
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
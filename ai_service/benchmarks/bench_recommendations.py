@@ -0,0 +1,139 @@
+"""Benchmark recommendation scoring against synthetic destination catalogs.
+
+Compares the original per-destination Python loop (built from the
+RecommendationEngine ``_calculate_*_match`` helpers) with the columnar
+``_score_catalog`` path for growing catalog sizes, then compares a batch of
+profiles sharing one score matrix with one ``get_recommendations`` call each,
+and times similar-destination queries on the largest catalog.
+
+Usage (from the ai_service directory):
+    python benchmarks/bench_recommendations.py [size ...]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_modules.recommendation_engine import RecommendationEngine
+
+CATEGORIES = ["city", "island", "mountain", "countryside", "desert"]
+REGIONS = ["Europe", "Asia", "North America", "South America", "Africa", "Oceania"]
+CLIMATES = ["temperate", "tropical", "mediterranean", "arid", "continental", "polar"]
+COST_LEVELS = ["low", "medium", "high"]
+SEASONS = ["spring", "summer", "autumn", "winter", "dry", "wet"]
+ACTIVITIES = ["culture", "food", "romance", "shopping", "technology", "beach", "relaxation",
+              "adventure", "entertainment", "hiking", "nightlife", "wildlife", "history", "skiing"]
+STYLES = ["luxury", "cultural", "romantic", "adventure", "relaxation", "budget", "balanced"]
+
+USER_PREFERENCES = {"cost_level": "medium", "travel_style": "adventure", "climate_preference": "tropical"}
+BUDGET_RANGE = {"min": 2000, "max": 5000}
+INTERESTS = ["culture", "food", "hik"]
+BATCH_SIZE = 200
+
+
+def synthetic_catalog(size, seed=0):
+    """Generate ``size`` random destinations in the engine's database format"""
+    rng = random.Random(seed)
+    return {
+        f"Destination {i}": {
+            "category": rng.choice(CATEGORIES),
+            "region": rng.choice(REGIONS),
+            "climate": rng.choice(CLIMATES),
+            "cost_level": rng.choice(COST_LEVELS),
+            "best_seasons": rng.sample(SEASONS, 2),
+            "activities": rng.sample(ACTIVITIES, 4),
+            "travel_styles": rng.sample(STYLES, 3),
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+            "popularity": round(rng.random(), 2)
+        }
+        for i in range(size)
+    }
+
+
+def loop_scores(engine, user_preferences, budget_range, travel_history, interests):
+    """Reference per-destination scoring loop"""
+    weights = engine.user_preference_weights
+    scores = {}
+    for destination, dest_data in engine.destination_database["destinations"].items():
+        if travel_history and destination in travel_history:
+            continue
+        score = 0.0
+        if budget_range and "cost_level" in user_preferences:
+            score += engine._calculate_cost_match(
+                dest_data["cost_level"], user_preferences["cost_level"], budget_range
+            ) * weights["cost_level"]
+        if interests:
+            score += engine._calculate_activity_match(dest_data["activities"], interests) * weights["activities"]
+        if "travel_style" in user_preferences:
+            score += engine._calculate_style_match(
+                dest_data["travel_styles"], user_preferences["travel_style"]
+            ) * weights["travel_style"]
+        if "climate_preference" in user_preferences:
+            score += engine._calculate_climate_match(
+                dest_data["climate"], user_preferences["climate_preference"]
+            ) * weights["climate"]
+        score += dest_data["popularity"] * weights["popularity"]
+        scores[destination] = score
+    return scores
+
+
+def best_of(fn, repeat):
+    """Return the fastest wall time of ``repeat`` calls in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main(sizes):
+    # Result caching disabled so every call measures scoring
+    engine = RecommendationEngine(cache_size=0)
+    history = ["Destination 1", "Destination 7"]
+    print(f"{'destinations':>12} {'loop ms':>10} {'vectorized ms':>14} {'speedup':>8}")
+    for size in sizes:
+        engine.load_catalog(synthetic_catalog(size))
+        expected = loop_scores(engine, USER_PREFERENCES, BUDGET_RANGE, history, INTERESTS)
+        actual = engine._calculate_destination_scores(USER_PREFERENCES, BUDGET_RANGE, history, INTERESTS)
+        assert actual == expected, "vectorized scores diverge from the reference loop"
+
+        repeat = 3 if size >= 100000 else 10
+        loop_ms = best_of(lambda: loop_scores(engine, USER_PREFERENCES, BUDGET_RANGE, history, INTERESTS), repeat)
+        vector_ms = best_of(lambda: engine._score_catalog(USER_PREFERENCES, BUDGET_RANGE, history, INTERESTS), repeat)
+        print(f"{size:>12} {loop_ms:>10.2f} {vector_ms:>14.2f} {loop_ms / vector_ms:>7.1f}x")
+
+    profiles = batch_profiles(BATCH_SIZE)
+    print(f"\n{BATCH_SIZE} profiles against {sizes[-1]} destinations")
+    single_ms = best_of(lambda: [engine.get_recommendations(**profile) for profile in profiles], 1)
+    batch_ms = best_of(lambda: list(engine.get_batch_recommendations(profiles)), 1)
+    print(f"{'one call per profile':>22} {single_ms:>10.2f} ms")
+    print(f"{'batched':>22} {batch_ms:>10.2f} ms")
+
+    engine.catalog.embeddings()
+    similar_ms = best_of(lambda: engine.get_similar_destinations("Destination 0", top_k=10), 20)
+    print(f"{'similar destinations':>22} {similar_ms:>10.2f} ms")
+
+
+def batch_profiles(count, seed=1):
+    """Generate ``count`` random profiles in get_recommendations keyword form"""
+    rng = random.Random(seed)
+    return [
+        {
+            "user_preferences": {
+                "cost_level": rng.choice(COST_LEVELS),
+                "travel_style": rng.choice(STYLES),
+                "climate_preference": rng.choice(CLIMATES + ["any"])
+            },
+            "budget_range": BUDGET_RANGE,
+            "travel_history": [f"Destination {rng.randrange(count)}"],
+            "interests": rng.sample(ACTIVITIES, 2)
+        }
+        for _ in range(count)
+    ]
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
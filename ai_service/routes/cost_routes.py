@@ -1,10 +1,15 @@
 from flask import Blueprint, request, jsonify
 import logging
+import os
 from ai_modules.cost_predictor import CostPredictor
 
 cost_bp = Blueprint('cost_bp', __name__)
 logger = logging.getLogger(__name__)
-cost_predictor = CostPredictor()
+cost_predictor = CostPredictor(
+    memo_size=int(os.environ.get('COST_PREDICTION_CACHE_SIZE', 4096)),
+    cost_database_path=os.environ.get('COST_DATABASE_PATH'),
+    rates_path=os.environ.get('EXCHANGE_RATES_PATH')
+)
 
 @cost_bp.route('/predict-costs', methods=['POST'])
 def predict_costs():
@@ -15,13 +20,43 @@ def predict_costs():
             duration=data.get('duration'),
             travel_style=data.get('travelStyle', 'balanced'),
             group_size=data.get('groupSize', 1),
-            season=data.get('season')
+            season=data.get('season'),
+            start_date=data.get('startDate'),
+            end_date=data.get('endDate'),
+            hemisphere=data.get('hemisphere'),
+            uncertainty=bool(data.get('includeUncertainty', False)),
+            currency=data.get('currency')
         )
         return jsonify({'success': True, 'costPrediction': cost_prediction})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error predicting costs: {str(e)}")
         return jsonify({'error': 'Failed to predict costs'}), 500
 
+@cost_bp.route('/predict-costs/grid', methods=['POST'])
+def predict_cost_grid():
+    try:
+        data = request.get_json()
+        cost_grid = cost_predictor.predict_grid(
+            destinations=data.get('destinations', []),
+            durations=data.get('durations', []),
+            travel_styles=data.get('travelStyles'),
+            group_sizes=data.get('groupSizes'),
+            seasons=data.get('seasons'),
+            currency=data.get('currency')
+        )
+        return jsonify({'success': True, 'costGrid': cost_grid})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error predicting cost grid: {str(e)}")
+        return jsonify({'error': 'Failed to predict cost grid'}), 500
+
+@cost_bp.route('/predict-costs/cache-stats', methods=['GET'])
+def get_cost_prediction_cache_stats():
+    return jsonify({'success': True, 'cacheStats': cost_predictor.prediction_cache.stats()})
+
 @cost_bp.route('/optimize-budget', methods=['POST'])
 def optimize_budget():
     try:
@@ -30,9 +65,30 @@ def optimize_budget():
             total_budget=data.get('totalBudget'),
             destination=data.get('destination'),
             duration=data.get('duration'),
-            preferences=data.get('preferences', {})
+            preferences=data.get('preferences', {}),
+            currency=data.get('currency')
         )
         return jsonify({'success': True, 'budgetOptimization': budget_optimization})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error optimizing budget: {str(e)}")
-        return jsonify({'error': 'Failed to optimize budget'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Failed to optimize budget'}), 500
+
+@cost_bp.route('/optimize-budget/batch', methods=['POST'])
+def optimize_budget_batch():
+    try:
+        data = request.get_json()
+        budget_optimizations = cost_predictor.optimize_budgets(
+            total_budgets=data.get('totalBudgets', []),
+            destinations=data.get('destinations'),
+            durations=data.get('durations'),
+            preferences=data.get('preferences', {}),
+            currency=data.get('currency')
+        )
+        return jsonify({'success': True, 'budgetOptimizations': budget_optimizations})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error optimizing budget batch: {str(e)}")
+        return jsonify({'error': 'Failed to optimize budgets'}), 500
\ No newline at end of file
@@ -1,29 +1,141 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import json
 import logging
+import math
+import os
 from ai_modules.itinerary_generator import ItineraryGenerator
 
 itinerary_bp = Blueprint('itinerary_bp', __name__)
 logger = logging.getLogger(__name__)
-itinerary_generator = ItineraryGenerator()
+itinerary_generator = ItineraryGenerator(cache_size=int(os.environ.get('ITINERARY_CACHE_SIZE', 256)))
+
+def _budget(data):
+    """The request's optional budget as a positive finite number"""
+    if data.get('budget') is None:
+        return None
+    try:
+        budget = float(data['budget'])
+    except (TypeError, ValueError):
+        raise ValueError('budget must be a number')
+    if not math.isfinite(budget) or budget <= 0:
+        raise ValueError('budget must be positive')
+    return budget
+
+def _group_size(data):
+    """The request's group size as a positive integer"""
+    try:
+        group_size = int(data.get('groupSize', 1))
+    except (TypeError, ValueError):
+        raise ValueError('groupSize must be an integer')
+    if group_size <= 0:
+        raise ValueError('groupSize must be positive')
+    return group_size
 
 @itinerary_bp.route('/generate-itinerary', methods=['POST'])
 def generate_itinerary():
     try:
         data = request.get_json()
+        budget, group_size = _budget(data), _group_size(data)
         itinerary = itinerary_generator.generate(
             destination=data.get('destination'),
             start_date=data.get('startDate'),
             end_date=data.get('endDate'),
-            budget=data.get('budget'),
+            budget=budget,
             travel_style=data.get('travelStyle', 'balanced'),
             interests=data.get('interests', []),
-            group_size=data.get('groupSize', 1)
+            group_size=group_size,
+            seed=data.get('seed')
         )
         return jsonify({'success': True, 'itinerary': itinerary})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error generating itinerary: {str(e)}")
         return jsonify({'error': 'Failed to generate itinerary'}), 500
 
+@itinerary_bp.route('/generate-itinerary/multi-city', methods=['POST'])
+def generate_multi_city_itinerary():
+    try:
+        data = request.get_json()
+        budget, group_size = _budget(data), _group_size(data)
+        itinerary = itinerary_generator.generate_multi_city(
+            destinations=data.get('destinations', []),
+            start_date=data.get('startDate'),
+            end_date=data.get('endDate'),
+            budget=budget,
+            travel_style=data.get('travelStyle', 'balanced'),
+            interests=data.get('interests', []),
+            group_size=group_size,
+            seed=data.get('seed')
+        )
+        return jsonify({'success': True, 'itinerary': itinerary})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error generating multi-city itinerary: {str(e)}")
+        return jsonify({'error': 'Failed to generate itinerary'}), 500
+
+@itinerary_bp.route('/generate-itinerary/regenerate-days', methods=['POST'])
+def regenerate_itinerary_days():
+    try:
+        data = request.get_json()
+        itinerary = itinerary_generator.regenerate_days(
+            itinerary=data.get('itinerary') or {},
+            day_numbers=data.get('dayNumbers', []),
+            interests=data.get('interests', []),
+            group_size=_group_size(data),
+            seed=data.get('seed')
+        )
+        return jsonify({'success': True, 'itinerary': itinerary})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error regenerating itinerary days: {str(e)}")
+        return jsonify({'error': 'Failed to regenerate itinerary days'}), 500
+
+@itinerary_bp.route('/generate-itinerary/stream', methods=['POST'])
+def stream_itinerary():
+    """Stream the itinerary as NDJSON: a header line, one line per day, then the tips"""
+    try:
+        data = request.get_json()
+        if not data.get('destination'):
+            return jsonify({'error': 'destination is required'}), 400
+        budget, group_size = _budget(data), _group_size(data)
+        chunks = itinerary_generator.stream(
+            destination=data.get('destination'),
+            start_date=data.get('startDate'),
+            end_date=data.get('endDate'),
+            budget=budget,
+            travel_style=data.get('travelStyle', 'balanced'),
+            interests=data.get('interests', []),
+            group_size=group_size,
+            seed=data.get('seed')
+        )
+        # stream() is lazy; building the header parses the dates, so bad
+        # input fails here rather than after the response has started
+        header = next(chunks)
+    except (TypeError, ValueError) as e:
+        logger.error(f"Invalid itinerary stream request: {str(e)}")
+        return jsonify({'error': f'Invalid itinerary request: {str(e)}'}), 400
+    except Exception as e:
+        logger.error(f"Error starting itinerary stream: {str(e)}")
+        return jsonify({'error': 'Failed to generate itinerary'}), 500
+
+    def generate():
+        try:
+            yield json.dumps(header) + '\n'
+            for chunk in chunks:
+                yield json.dumps(chunk) + '\n'
+        except Exception as e:
+            logger.error(f"Error streaming itinerary: {str(e)}")
+            yield json.dumps({'type': 'error', 'error': 'Failed to generate itinerary'}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@itinerary_bp.route('/generate-itinerary/cache-stats', methods=['GET'])
+def get_itinerary_cache_stats():
+    return jsonify({'success': True, 'cacheStats': itinerary_generator.itinerary_cache.stats()})
+
 @itinerary_bp.route('/generate-travel-tips', methods=['POST'])
 def generate_travel_tips():
     try:
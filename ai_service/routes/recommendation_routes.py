@@ -1,10 +1,35 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import json
 import logging
+import os
+from ai_modules.cost_predictor import CostPredictor
 from ai_modules.recommendation_engine import RecommendationEngine
 
 recommendation_bp = Blueprint('recommendation_bp', __name__)
 logger = logging.getLogger(__name__)
-recommendation_engine = RecommendationEngine()
+recommendation_engine = RecommendationEngine(
+    catalog_path=os.environ.get('DESTINATION_CATALOG_PATH'),
+    reload_interval=float(os.environ.get('DESTINATION_CATALOG_RELOAD_INTERVAL', 5)),
+    cache_size=int(os.environ.get('RECOMMENDATION_CACHE_SIZE', 1024)),
+    cache_ttl=float(os.environ.get('RECOMMENDATION_CACHE_TTL', 300)),
+    similarity_model_path=os.environ.get('ITEM_SIMILARITY_PATH'),
+    cost_predictor=CostPredictor(cost_database_path=os.environ.get('COST_DATABASE_PATH'))
+)
+# The batch body is parsed whole before streaming starts, so bound its size
+max_batch_bytes = int(os.environ.get('RECOMMENDATION_BATCH_MAX_BYTES', 4 * 1024 * 1024))
+max_batch_profiles = int(os.environ.get('RECOMMENDATION_BATCH_MAX_PROFILES', 1000))
+
+def _duration(value):
+    """Optional trip duration in days, as a positive integer"""
+    if value is None:
+        return None
+    try:
+        duration = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('duration must be an integer')
+    if duration <= 0:
+        raise ValueError('duration must be positive')
+    return duration
 
 @recommendation_bp.route('/get-recommendations', methods=['POST'])
 def get_recommendations():
@@ -14,9 +39,118 @@ def get_recommendations():
             user_preferences=data.get('preferences', {}),
             budget_range=data.get('budgetRange'),
             travel_history=data.get('travelHistory', []),
-            interests=data.get('interests', [])
+            interests=data.get('interests', []),
+            top_k=int(data.get('topK', 5)),
+            duration=_duration(data.get('duration')),
+            group_size=int(data.get('groupSize', 1)),
+            cursor=data.get('cursor')
         )
         return jsonify({'success': True, 'recommendations': recommendations})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting recommendations: {str(e)}")
-        return jsonify({'error': 'Failed to get recommendations'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Failed to get recommendations'}), 500
+
+def _batch_profile(profile):
+    """Batch profile in get_recommendations keyword form"""
+    return {
+        'user_preferences': profile.get('preferences', {}),
+        'budget_range': profile.get('budgetRange'),
+        'travel_history': profile.get('travelHistory', []),
+        'interests': profile.get('interests', []),
+        'top_k': int(profile.get('topK', 5)),
+        'duration': _duration(profile.get('duration')),
+        'group_size': int(profile.get('groupSize', 1))
+    }
+
+def _ndjson_profiles(stream):
+    """Parse one profile per line of an NDJSON body as the batch consumes them"""
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield _batch_profile(json.loads(line))
+        except (TypeError, ValueError, AttributeError) as e:
+            raise ValueError(f"Invalid profile on line {number}: {str(e)}")
+
+@recommendation_bp.route('/get-recommendations/batch', methods=['POST'])
+def get_batch_recommendations():
+    """Stream one NDJSON line per preference profile, in request order.
+    
+    An ``application/x-ndjson`` body (one profile per line) is read line by
+    line as results stream out, so it has no size limit; a JSON body is
+    parsed whole and capped.
+    """
+    if request.mimetype == 'application/x-ndjson':
+        profiles = _ndjson_profiles(request.stream)
+    else:
+        if request.content_length is not None and request.content_length > max_batch_bytes:
+            return jsonify({'error': f'Batch request body exceeds {max_batch_bytes} bytes'}), 413
+        try:
+            data = request.get_json()
+            if len(data.get('profiles', [])) > max_batch_profiles:
+                return jsonify({'error': f'At most {max_batch_profiles} profiles per batch'}), 413
+            profiles = [_batch_profile(profile) for profile in data.get('profiles', [])]
+        except (TypeError, ValueError, AttributeError) as e:
+            logger.error(f"Invalid batch recommendation request: {str(e)}")
+            return jsonify({'error': 'Invalid batch recommendation request'}), 400
+        except Exception as e:
+            logger.error(f"Error parsing batch recommendation request: {str(e)}")
+            return jsonify({'error': 'Failed to get recommendations'}), 500
+
+    def generate():
+        try:
+            results = recommendation_engine.get_batch_recommendations(profiles)
+            for index, recommendations in enumerate(results):
+                yield json.dumps({'index': index, 'recommendations': recommendations}) + '\n'
+        except ValueError as e:
+            logger.error(f"Invalid batch recommendation request: {str(e)}")
+            yield json.dumps({'error': str(e)}) + '\n'
+        except Exception as e:
+            logger.error(f"Error getting batch recommendations: {str(e)}")
+            yield json.dumps({'error': 'Failed to get recommendations'}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@recommendation_bp.route('/get-similar-destinations', methods=['POST'])
+def get_similar_destinations():
+    try:
+        data = request.get_json()
+        destination = data.get('destination')
+        if not isinstance(destination, str) or not destination:
+            return jsonify({'error': 'destination must be a non-empty string'}), 400
+        similar = recommendation_engine.get_similar_destinations(
+            destination=destination,
+            top_k=int(data.get('topK', 5)),
+            exclude=data.get('exclude', [])
+        )
+        return jsonify({'success': True, 'similar': similar})
+    except KeyError:
+        return jsonify({'error': 'Unknown destination'}), 404
+    except Exception as e:
+        logger.error(f"Error getting similar destinations: {str(e)}")
+        return jsonify({'error': 'Failed to get similar destinations'}), 500
+
+@recommendation_bp.route('/get-recommendations/cache-stats', methods=['GET'])
+def get_recommendation_cache_stats():
+    return jsonify({
+        'success': True,
+        'cacheStats': recommendation_engine.result_cache.stats(),
+        'rankingCacheStats': recommendation_engine.ranking_cache.stats()
+    })
+
+@recommendation_bp.route('/reload-catalog', methods=['POST'])
+def reload_catalog():
+    try:
+        reloaded = recommendation_engine.reload_catalog()
+        catalog = recommendation_engine.catalog
+        return jsonify({
+            'success': True,
+            'reloaded': reloaded,
+            'catalogVersion': catalog.version,
+            'destinations': len(catalog)
+        })
+    except Exception as e:
+        logger.error(f"Error reloading catalog: {str(e)}")
+        return jsonify({'error': 'Failed to reload catalog'}), 500
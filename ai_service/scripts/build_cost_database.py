@@ -0,0 +1,31 @@
+"""Publish a destination cost snapshot for memory-mapped loading.
+
+Reads a CSV or Parquet snapshot with a ``destination`` column, one
+``<category>_<tier>`` daily cost column for every category (accommodation,
+food, transportation, activities) and tier (budget, mid, luxury), and
+optional ``cost_index`` and ``hemisphere`` columns. Publishes it as a new
+version of the columnar cost database in OUTPUT_DIR; point COST_DATABASE_PATH
+at OUTPUT_DIR to use it.
+
+Usage (from the ai_service directory):
+    python scripts/build_cost_database.py costs.csv|costs.parquet OUTPUT_DIR
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_modules.cost_database import CostDatabase
+
+
+def main(input_path, output_dir):
+    database = CostDatabase.from_snapshot(input_path)
+    version = database.save(output_dir)
+    print(f"Published costs for {len(database)} destinations as version {version} in {output_dir}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1], sys.argv[2])
@@ -0,0 +1,35 @@
+"""Publish a destination catalog for memory-mapped loading.
+
+Reads a JSON file holding either ``{"destinations": {name: attributes}}`` or
+``{name: attributes}`` in the RecommendationEngine database format and
+publishes it as a new version of the columnar catalog in OUTPUT_DIR. Running
+workers pointed at OUTPUT_DIR through DESTINATION_CATALOG_PATH pick it up on
+their next reload check (or immediately via POST /reload-catalog).
+
+Usage (from the ai_service directory):
+    python scripts/build_destination_catalog.py destinations.json OUTPUT_DIR
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_modules.destination_catalog import DestinationCatalog
+
+
+def main(input_path, output_dir):
+    with open(input_path, encoding="utf-8") as f:
+        data = json.load(f)
+    destinations = data.get("destinations", data)
+
+    catalog = DestinationCatalog.from_destinations(destinations)
+    version = catalog.save(output_dir)
+    print(f"Published {len(catalog)} destinations as version {version} in {output_dir}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1], sys.argv[2])
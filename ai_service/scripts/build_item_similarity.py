@@ -0,0 +1,28 @@
+"""Build the item-item similarity model from exported booking history.
+
+Reads mongoexport JSONL exports of the Itinerary and Booking collections and
+publishes a sparse destination x destination similarity model to OUTPUT_DIR.
+Point ITEM_SIMILARITY_PATH at OUTPUT_DIR to blend it into recommendations.
+
+Usage (from the ai_service directory):
+    python scripts/build_item_similarity.py OUTPUT_DIR itineraries.jsonl bookings.jsonl [...]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_modules.collaborative_filter import ItemSimilarityModel, read_history_pairs
+
+
+def main(output_dir, export_paths):
+    model = ItemSimilarityModel.build(read_history_pairs(export_paths))
+    version = model.save(output_dir)
+    print(f"Published similarities for {len(model.items)} destinations as version {version} in {output_dir}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1], sys.argv[2:])